@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Read-path benchmark: per-item Pydantic models + response_model validation vs. ReadProjection
+Run from the backend directory: python benchmarks/bench_read_path.py [--runs 200]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import List
+
+from pydantic import TypeAdapter
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from server import Incident, INCIDENT_READ, MongoJSONResponse  # noqa: E402
+from bench_serialization import make_incidents  # noqa: E402
+
+INCIDENT_LIST = TypeAdapter(List[Incident])
+
+
+def validated_path(documents):
+    """Incident(**doc) per item, then FastAPI's response_model validate + serialize + JSONResponse"""
+    items = [Incident(**document) for document in documents]
+    content = INCIDENT_LIST.validate_python([item.model_dump() for item in items])
+    return json.dumps(INCIDENT_LIST.dump_python(content, mode="json"), ensure_ascii=False).encode("utf-8")
+
+
+def read_projection_path(documents):
+    """ReadProjection.response - defaults filled in, encoded once by orjson"""
+    return MongoJSONResponse([INCIDENT_READ.prepare(document) for document in documents]).body
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def measure(func, documents, runs):
+    samples = []
+    for _ in range(runs):
+        # Fresh dicts, as returned by the driver for every request
+        batch = [dict(document) for document in documents]
+        start = time.perf_counter()
+        func(batch)
+        samples.append(time.perf_counter() - start)
+    return percentile(samples, 0.5), percentile(samples, 0.99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000])
+    args = parser.parse_args()
+
+    print(f"📊 Read-path benchmark - {args.runs} runs per case")
+    for size in args.sizes:
+        documents = [
+            {k: v for k, v in document.items() if k in INCIDENT_READ.projection and k != "_id"}
+            for document in make_incidents(size)
+        ]
+        for name, func in (("Pydantic per item + response_model", validated_path),
+                           ("ReadProjection + orjson", read_projection_path)):
+            p50, p99 = measure(func, documents, args.runs)
+            print(f"  {size:>5} items  {name:<36} p50 {p50 * 1000:8.3f} ms   p99 {p99 * 1000:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
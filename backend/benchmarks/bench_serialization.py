@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Serialisation micro-benchmark: serialize_mongo_data + jsonable_encoder vs. MongoJSONResponse
+Run from the backend directory: python benchmarks/bench_serialization.py [--items 1000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+import uuid
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from server import serialize_mongo_data, MongoJSONResponse  # noqa: E402
+
+
+def make_incidents(count):
+    """Incident documents shaped like db.incidents results (with _id)"""
+    now = datetime.utcnow()
+    return [
+        {
+            "_id": ObjectId(),
+            "id": str(uuid.uuid4()),
+            "title": f"Vorfall {i}",
+            "description": "Ruhestörung in der Innenstadt, mehrere Anrufer melden laute Musik. " * 3,
+            "priority": ("high", "medium", "low")[i % 3],
+            "status": "open",
+            "location": {"lat": 51.2879 + i * 0.0001, "lng": 7.2954 + i * 0.0001},
+            "coordinates": {"lat": 51.2879 + i * 0.0001, "lng": 7.2954 + i * 0.0001},
+            "address": f"Hauptstraße {i}, 58332 Schwelm",
+            "reported_by": "admin",
+            "assigned_to": None,
+            "assigned_to_name": None,
+            "assigned_at": None,
+            "images": [],
+            "created_at": now - timedelta(minutes=i),
+            "updated_at": now - timedelta(minutes=i)
+        }
+        for i in range(count)
+    ]
+
+
+def current_path(documents):
+    """serialize_mongo_data, then FastAPI's jsonable_encoder + JSONResponse json.dumps"""
+    content = jsonable_encoder(serialize_mongo_data(documents))
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def orjson_path(documents):
+    """MongoJSONResponse returned directly from the handler"""
+    return MongoJSONResponse(documents).body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=20)
+    args = parser.parse_args()
+
+    documents = make_incidents(args.items)
+    projected = [{k: v for k, v in d.items() if k != "_id"} for d in documents]
+
+    cases = [
+        ("serialize_mongo_data + jsonable_encoder", current_path, documents),
+        ("MongoJSONResponse (orjson)", orjson_path, documents),
+        ("MongoJSONResponse, _id projected away", orjson_path, projected),
+    ]
+
+    print(f"📊 Serialisation benchmark - {args.items} incidents, best of {args.repeat} x {args.number}")
+    baseline = None
+    for name, func, data in cases:
+        best = min(timeit.repeat(lambda: func(data), repeat=args.repeat, number=args.number)) / args.number
+        baseline = baseline or best
+        print(f"  {name:<42} {best * 1000:8.3f} ms  ({baseline / best:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
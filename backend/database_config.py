@@ -9,6 +9,9 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# SQL-Queries nur auf Wunsch loggen - echo schreibt jede Query synchron ins Log
+SQL_ECHO = os.getenv("SQL_ECHO", "false").lower() == "true"
+
 # ================================================
 # DATENBANK-KONFIGURATIONEN
 # ================================================
@@ -70,7 +73,7 @@ def create_database_engine(db_type="mysql"):
         database_url = get_mysql_url()
         engine = create_async_engine(
             database_url,
-            echo=True,  # SQL-Queries loggen
+            echo=SQL_ECHO,
             pool_size=20,
             max_overflow=30,
             pool_pre_ping=True,
@@ -82,7 +85,7 @@ def create_database_engine(db_type="mysql"):
         database_url = get_postgres_url()
         engine = create_async_engine(
             database_url,
-            echo=True,
+            echo=SQL_ECHO,
             pool_size=20,
             max_overflow=30,
             pool_pre_ping=True,
@@ -94,7 +97,7 @@ def create_database_engine(db_type="mysql"):
         database_url = get_sqlite_url()
         engine = create_async_engine(
             database_url,
-            echo=True,
+            echo=SQL_ECHO,
             connect_args={"check_same_thread": False}
         )
         print(f"🔗 SQLite Engine erstellt: {database_url}")
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Precompress the web build for PrecompressedStaticFiles in server.py
+Run after 'npx expo export --platform web': python precompress_static.py [dist directory]
+"""
+
+import gzip
+import os
+import sys
+from pathlib import Path
+
+import brotli
+
+DEFAULT_DIST_DIR = Path(__file__).parent.parent / "frontend" / "dist"
+COMPRESSIBLE_EXTENSIONS = {".js", ".mjs", ".css", ".html", ".json", ".map", ".svg", ".txt", ".ttf", ".otf", ".ico", ".wasm"}
+MINIMUM_SIZE = 1024
+
+
+def precompress_file(path: Path):
+    """Write .br and .gz next to path when they are smaller than the original"""
+    data = path.read_bytes()
+    written = []
+    for suffix, compress in ((".br", lambda d: brotli.compress(d, quality=11)),
+                             (".gz", lambda d: gzip.compress(d, compresslevel=9, mtime=0))):
+        compressed = compress(data)
+        target = path.with_name(path.name + suffix)
+        if len(compressed) < len(data):
+            target.write_bytes(compressed)
+            written.append(suffix)
+        elif target.exists():
+            target.unlink()  # stale variant from an earlier build
+    return len(data), written
+
+
+def main():
+    dist_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_DIST_DIR
+    if not dist_dir.is_dir():
+        print(f"❌ Build directory not found: {dist_dir}")
+        sys.exit(1)
+
+    files = 0
+    original_bytes = 0
+    for root, _dirs, names in os.walk(dist_dir):
+        for name in names:
+            path = Path(root) / name
+            if path.suffix.lower() not in COMPRESSIBLE_EXTENSIONS or path.stat().st_size < MINIMUM_SIZE:
+                continue
+            size, written = precompress_file(path)
+            if written:
+                files += 1
+                original_bytes += size
+
+    print(f"✅ Precompressed {files} files ({original_bytes / 1024:.0f} KiB) in {dist_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,421 @@
+"""
+Data access layer - one repository per aggregate
+Route handlers go through these instead of db.<collection>, so query shapes, projections,
+timing and cache invalidation live in one place. FakeDatabase is an in-memory stand-in
+for benchmarking handler logic without MongoDB.
+"""
+
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+
+NO_ID = {"_id": 0}
+
+
+class RepositoryHooks:
+    """Shared by all repositories of one Repositories instance.
+    observers(collection, operation, seconds) are called after every operation,
+    write_hooks(collection, operation) after every successful write (cache invalidation)."""
+
+    def __init__(self):
+        self.observers: List[Callable[[str, str, float], None]] = []
+        self.write_hooks: List[Callable[[str, str], None]] = []
+
+    def observe(self, collection_name: str, operation: str, seconds: float):
+        for observer in self.observers:
+            observer(collection_name, operation, seconds)
+
+    def written(self, collection_name: str, operation: str):
+        for hook in self.write_hooks:
+            hook(collection_name, operation)
+
+
+class Repository:
+    """Generic access to one collection; documents come back without _id unless a projection asks for it"""
+    collection_name = ""
+
+    def __init__(self, database, hooks: RepositoryHooks, collection_name: Optional[str] = None):
+        self.database = database
+        self.hooks = hooks
+        if collection_name:
+            self.collection_name = collection_name
+
+    @property
+    def collection(self):
+        return self.database[self.collection_name]
+
+    def using(self, database) -> "Repository":
+        """Same repository on another database handle, e.g. one routed to secondaries"""
+        return type(self)(database, self.hooks, self.collection_name)
+
+    async def timed(self, operation: str, awaitable):
+        start = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self.hooks.observe(self.collection_name, operation, time.perf_counter() - start)
+
+    async def written(self, operation: str, awaitable):
+        result = await self.timed(operation, awaitable)
+        self.hooks.written(self.collection_name, operation)
+        return result
+
+    # Reads
+    async def get(self, query: dict, projection: Optional[dict] = None) -> Optional[dict]:
+        return await self.timed("find_one", self.collection.find_one(query, projection or NO_ID))
+
+    async def find(self, query: Optional[dict] = None, projection: Optional[dict] = None,
+                   sort: Optional[List[tuple]] = None, limit: int = 100, skip: int = 0) -> List[dict]:
+        cursor = self.collection.find(query or {}, projection or NO_ID)
+        if sort:
+            cursor = cursor.sort(sort)
+        if skip:
+            cursor = cursor.skip(skip)
+        if limit:
+            cursor = cursor.limit(limit)
+        return await self.timed("find", cursor.to_list(limit or None))
+
+    async def count(self, query: Optional[dict] = None) -> int:
+        return await self.timed("count", self.collection.count_documents(query or {}))
+
+    # Writes - the caller's document is not modified (no _id is added to it)
+    async def insert(self, document: dict):
+        return await self.written("insert_one", self.collection.insert_one(dict(document)))
+
+    async def insert_many(self, documents: List[dict], ordered: bool = True):
+        return await self.written("insert_many", self.collection.insert_many([dict(d) for d in documents], ordered=ordered))
+
+    async def update(self, query: dict, update: dict, upsert: bool = False):
+        return await self.written("update_one", self.collection.update_one(query, update, upsert=upsert))
+
+    async def update_many(self, query: dict, update: dict):
+        return await self.written("update_many", self.collection.update_many(query, update))
+
+    async def delete(self, query: dict):
+        return await self.written("delete_one", self.collection.delete_one(query))
+
+    async def bulk_write(self, operations: List[Any], ordered: bool = True):
+        return await self.written("bulk_write", self.collection.bulk_write(operations, ordered=ordered))
+
+
+class UsersRepository(Repository):
+    collection_name = "users"
+
+    async def get_by_id(self, user_id: str, projection: Optional[dict] = None) -> Optional[dict]:
+        return await self.get({"id": user_id}, projection)
+
+    async def get_by_email(self, email: str, projection: Optional[dict] = None) -> Optional[dict]:
+        return await self.get({"email": email}, projection)
+
+    async def find_by_identifier(self, identifier: str, user_id: Optional[str] = None) -> Optional[dict]:
+        """Token subject lookup - the subject may be a user id or an email, with user_id as fallback"""
+        user = None
+        if identifier and '-' in identifier and len(identifier) == 36:
+            user = await self.get_by_id(identifier)
+        if user is None:
+            user = await self.get_by_email(identifier)
+        if user is None and user_id:
+            user = await self.get_by_id(user_id)
+        return user
+
+
+class IncidentsRepository(Repository):
+    collection_name = "incidents"
+
+    async def get_by_id(self, incident_id: str, projection: Optional[dict] = None) -> Optional[dict]:
+        return await self.get({"id": incident_id}, projection)
+
+    async def list_recent(self, projection: Optional[dict] = None, limit: int = 100) -> List[dict]:
+        return await self.find({}, projection, sort=[("created_at", -1)], limit=limit)
+
+    async def update_fields(self, incident_id: str, fields: dict) -> bool:
+        """$set fields; False when the incident does not exist"""
+        result = await self.update({"id": incident_id}, {"$set": fields})
+        return result.matched_count > 0
+
+
+class MessagesRepository(Repository):
+    collection_name = "messages"
+
+    async def list_channel(self, channel: str, limit: int = 100) -> List[dict]:
+        return await self.find({"channel": channel}, sort=[("timestamp", 1)], limit=limit)
+
+
+class ReportsRepository(Repository):
+    collection_name = "reports"
+
+    async def list_by_author(self, author_id: Optional[str], projection: Optional[dict] = None,
+                             limit: int = 1000) -> List[dict]:
+        """Newest first; all reports when author_id is None"""
+        query = {"author_id": author_id} if author_id else {}
+        return await self.find(query, projection, sort=[("created_at", -1)], limit=limit)
+
+
+class PersonsRepository(Repository):
+    collection_name = "persons"
+
+    async def list_active(self, status: Optional[str] = None, projection: Optional[dict] = None,
+                          limit: int = 100) -> List[dict]:
+        query = {"is_active": True}
+        if status:
+            query["status"] = status
+        return await self.find(query, projection, sort=[("created_at", -1)], limit=limit)
+
+    async def count_by_status(self, statuses) -> Dict[str, int]:
+        """{"total": active persons, status: active persons with that status}"""
+        counts = {"total": await self.count({"is_active": True})}
+        for status in statuses:
+            counts[status] = await self.count({"is_active": True, "status": status})
+        return counts
+
+
+class LocationsRepository(Repository):
+    collection_name = "locations"
+
+    async def record(self, point: dict):
+        return await self.insert(point)
+
+
+class LeaveRepository:
+    """Vacation requests and sick leave of one user - two collections, one aggregate"""
+
+    def __init__(self, database, hooks: RepositoryHooks):
+        self.vacations = Repository(database, hooks, "vacations")
+        self.sick_leave = Repository(database, hooks, "sick_leave")
+
+    async def create_vacation(self, vacation: dict):
+        return await self.vacations.insert(vacation)
+
+    async def create_sick_leave(self, sick_leave: dict):
+        return await self.sick_leave.insert(sick_leave)
+
+
+class Repositories:
+    """All repositories on one database, sharing hooks"""
+
+    def __init__(self, database):
+        self.hooks = RepositoryHooks()
+        self.users = UsersRepository(database, self.hooks)
+        self.incidents = IncidentsRepository(database, self.hooks)
+        self.messages = MessagesRepository(database, self.hooks)
+        self.reports = ReportsRepository(database, self.hooks)
+        self.persons = PersonsRepository(database, self.hooks)
+        self.locations = LocationsRepository(database, self.hooks)
+        self.checkins = Repository(database, self.hooks, "checkins")
+        self.leave = LeaveRepository(database, self.hooks)
+
+
+# In-memory backend - enough of the Motor API for the repositories above
+def _get_field(document: dict, path: str):
+    value = document
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def _matches(document: dict, query: dict) -> bool:
+    for field, condition in query.items():
+        if field == "$and" and not all(_matches(document, part) for part in condition):
+            return False
+        if field == "$or" and not any(_matches(document, part) for part in condition):
+            return False
+        if field in ("$and", "$or"):
+            continue
+        value = _get_field(document, field)
+        if isinstance(condition, dict) and condition and all(key.startswith("$") for key in condition):
+            for operator, operand in condition.items():
+                if operator == "$in" and value not in operand:
+                    return False
+                if operator == "$nin" and value in operand:
+                    return False
+                if operator == "$ne" and value == operand:
+                    return False
+                if operator == "$exists" and (value is not None) != bool(operand):
+                    return False
+                if operator in ("$gt", "$gte", "$lt", "$lte"):
+                    if value is None:
+                        return False
+                    if operator == "$gt" and not value > operand:
+                        return False
+                    if operator == "$gte" and not value >= operand:
+                        return False
+                    if operator == "$lt" and not value < operand:
+                        return False
+                    if operator == "$lte" and not value <= operand:
+                        return False
+        elif value != condition:
+            return False
+    return True
+
+
+def _project(document: dict, projection: Optional[dict]) -> dict:
+    if not projection:
+        return dict(document)
+    included = [key for key, flag in projection.items() if flag and key != "_id"]
+    if included:
+        result = {key: document[key] for key in included if key in document}
+        if projection.get("_id", 1) and "_id" in document:
+            result["_id"] = document["_id"]
+        return result
+    return {key: value for key, value in document.items() if projection.get(key, 1)}
+
+
+def _apply_update(document: dict, update: dict, inserting: bool = False):
+    for operator, fields in update.items():
+        for field, value in fields.items():
+            if operator == "$set" or (operator == "$setOnInsert" and inserting):
+                document[field] = value
+            elif operator == "$inc":
+                document[field] = document.get(field, 0) + value
+            elif operator == "$max":
+                if document.get(field) is None or value > document[field]:
+                    document[field] = value
+            elif operator == "$push":
+                document.setdefault(field, []).append(value)
+            elif operator == "$unset":
+                document.pop(field, None)
+
+
+class FakeCursor:
+    def __init__(self, documents: List[dict]):
+        self.documents = documents
+
+    def sort(self, key, direction=1):
+        keys = key if isinstance(key, list) else [(key, direction)]
+        for field, order in reversed(keys):
+            self.documents.sort(key=lambda d: (_get_field(d, field) is not None, _get_field(d, field)), reverse=order < 0)
+        return self
+
+    def skip(self, count: int):
+        self.documents = self.documents[count:]
+        return self
+
+    def limit(self, count: int):
+        if count:
+            self.documents = self.documents[:count]
+        return self
+
+    async def to_list(self, length=None):
+        return self.documents[:length] if length else list(self.documents)
+
+
+class FakeCollection:
+    def __init__(self):
+        self.documents: List[dict] = []
+        self.next_id = 0
+
+    def _matching(self, query: dict) -> List[dict]:
+        return [document for document in self.documents if _matches(document, query or {})]
+
+    async def find_one(self, query=None, projection=None):
+        matching = self._matching(query)
+        return _project(matching[0], projection) if matching else None
+
+    def find(self, query=None, projection=None):
+        return FakeCursor([_project(document, projection) for document in self._matching(query)])
+
+    async def count_documents(self, query=None):
+        return len(self._matching(query))
+
+    async def insert_one(self, document: dict):
+        self.next_id += 1
+        document.setdefault("_id", self.next_id)
+        self.documents.append(dict(document))
+        return SimpleNamespace(inserted_id=document["_id"], acknowledged=True)
+
+    async def insert_many(self, documents: List[dict], ordered: bool = True):
+        ids = [(await self.insert_one(document)).inserted_id for document in documents]
+        return SimpleNamespace(inserted_ids=ids, acknowledged=True)
+
+    async def _update(self, query, update, upsert, many):
+        matching = self._matching(query)
+        if not many:
+            matching = matching[:1]
+        for document in matching:
+            _apply_update(document, update)
+        upserted_id = None
+        if not matching and upsert:
+            document = {key: value for key, value in (query or {}).items() if not isinstance(value, dict)}
+            _apply_update(document, update, inserting=True)
+            upserted_id = (await self.insert_one(document)).inserted_id
+        return SimpleNamespace(matched_count=len(matching), modified_count=len(matching), upserted_id=upserted_id)
+
+    async def update_one(self, query, update, upsert=False):
+        return await self._update(query, update, upsert, many=False)
+
+    async def update_many(self, query, update, upsert=False):
+        return await self._update(query, update, upsert, many=True)
+
+    async def _delete(self, query, many):
+        matching = self._matching(query)
+        if not many:
+            matching = matching[:1]
+        for document in matching:
+            self.documents.remove(document)
+        return SimpleNamespace(deleted_count=len(matching))
+
+    async def delete_one(self, query):
+        return await self._delete(query, many=False)
+
+    async def delete_many(self, query):
+        return await self._delete(query, many=True)
+
+    async def replace_one(self, query, replacement, upsert=False):
+        matching = self._matching(query)[:1]
+        for document in matching:
+            kept_id = document.get("_id")
+            document.clear()
+            document.update(replacement)
+            if kept_id is not None:
+                document["_id"] = kept_id
+        upserted_id = None
+        if not matching and upsert:
+            upserted_id = (await self.insert_one(dict(replacement))).inserted_id
+        return SimpleNamespace(matched_count=len(matching), modified_count=len(matching), upserted_id=upserted_id)
+
+    async def bulk_write(self, operations, ordered=True):
+        """pymongo InsertOne, UpdateOne/UpdateMany, ReplaceOne and DeleteOne/DeleteMany requests"""
+        counts = {"inserted_count": 0, "matched_count": 0, "modified_count": 0, "deleted_count": 0}
+        upserted_ids = {}
+        for index, operation in enumerate(operations):
+            kind = type(operation).__name__
+            if kind == "InsertOne":
+                await self.insert_one(operation._doc)
+                counts["inserted_count"] += 1
+                continue
+            if kind in ("UpdateOne", "UpdateMany"):
+                result = await self._update(operation._filter, operation._doc, operation._upsert, many=kind == "UpdateMany")
+            elif kind == "ReplaceOne":
+                result = await self.replace_one(operation._filter, operation._doc, upsert=operation._upsert)
+            elif kind in ("DeleteOne", "DeleteMany"):
+                result = await self._delete(operation._filter, many=kind == "DeleteMany")
+                counts["deleted_count"] += result.deleted_count
+                continue
+            else:
+                raise TypeError(f"FakeCollection.bulk_write does not support {kind}")
+            counts["matched_count"] += result.matched_count
+            counts["modified_count"] += result.modified_count
+            if result.upserted_id is not None:
+                upserted_ids[index] = result.upserted_id
+        return SimpleNamespace(**counts, upserted_count=len(upserted_ids), upserted_ids=upserted_ids, acknowledged=True)
+
+
+class FakeDatabase:
+    """In-memory database - FakeDatabase({"users": [...]}) seeds collections"""
+
+    def __init__(self, collections: Optional[Dict[str, List[dict]]] = None):
+        self.collections: Dict[str, FakeCollection] = {}
+        for name, documents in (collections or {}).items():
+            self[name].documents = [dict(document) for document in documents]
+
+    def __getitem__(self, name: str) -> FakeCollection:
+        if name not in self.collections:
+            self.collections[name] = FakeCollection()
+        return self.collections[name]
+
+    def __getattr__(self, name: str) -> FakeCollection:
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return self[name]
@@ -1,50 +1,493 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Request, Response, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.exceptions import HTTPException as StarletteHTTPException
+from starlette.staticfiles import NotModifiedResponse
+from starlette.concurrency import run_in_threadpool
 from motor.motor_asyncio import AsyncIOMotorClient
 from bson import ObjectId
+from pymongo import UpdateOne, ReplaceOne, monitoring, read_preferences
+from pymongo.errors import BulkWriteError, CollectionInvalid, DuplicateKeyError, OperationFailure
 import socketio
+import asyncio
 import os
+import sys
+import re
+import stat
+import mimetypes
 import logging
+import logging.handlers
+import queue
+import atexit
+import itertools
+import traceback
 from pathlib import Path
 from pydantic import BaseModel, Field, EmailStr
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 import uuid
+import threading
+import functools
+from collections import OrderedDict
+from contextvars import ContextVar
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 import hashlib
 import secrets
+import base64
+import gzip
+import time
+import orjson
+import brotli
+
+from repositories import Repositories
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Logging - records are queued on the event loop and formatted/written by a listener thread
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # json or text
+LOG_LEVELS = os.getenv("LOG_LEVELS", "pymongo=WARNING,socketio=WARNING,engineio=WARNING")  # per-module levels
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "heartbeat=100,gps=50")  # keep 1 of N records per sample key
+
+LOG_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "sample"}
+
+class JSONLogFormatter(logging.Formatter):
+    """One JSON object per line; extra={...} fields become top-level keys"""
+    def format(self, record):
+        entry = {
+            "ts": datetime.utcfromtimestamp(record.created).isoformat(timespec="milliseconds") + "Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        for key, value in record.__dict__.items():
+            if key not in LOG_RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry, default=str).decode("utf-8")
+
+class SamplingFilter(logging.Filter):
+    """Passes 1 of N records logged with extra={"sample": key}, e.g. heartbeats and GPS pings"""
+    def __init__(self, rates: Dict[str, int]):
+        super().__init__()
+        self.rates = rates
+        self.counters = {key: itertools.count() for key in rates}
+
+    def filter(self, record):
+        key = getattr(record, "sample", None)
+        if key not in self.rates:
+            return True
+        return next(self.counters[key]) % self.rates[key] == 0
+
+def parse_key_values(value: str) -> Dict[str, str]:
+    """'a=1,b=2' -> {"a": "1", "b": "2"}"""
+    return dict(item.split("=", 1) for item in value.replace(" ", "").split(",") if "=" in item)
+
+def configure_logging():
+    log_handler = logging.StreamHandler(sys.stdout)
+    if LOG_FORMAT == "json":
+        log_handler.setFormatter(JSONLogFormatter())
+    else:
+        log_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    
+    queue_handler = logging.handlers.QueueHandler(queue.SimpleQueue())
+    queue_handler.addFilter(SamplingFilter({key: max(1, int(rate)) for key, rate in parse_key_values(LOG_SAMPLE_RATES).items()}))
+    root_logger = logging.getLogger()
+    root_logger.handlers[:] = [queue_handler]
+    root_logger.setLevel(LOG_LEVEL)
+    for name, level in parse_key_values(LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(level.upper())
+    
+    listener = logging.handlers.QueueListener(queue_handler.queue, log_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)  # flush queued records on exit
+
+configure_logging()
+logger = logging.getLogger(__name__)
+
+# Request metrics - per-route latency, response sizes and MongoDB calls per request
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+RESPONSE_SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+DB_CALLS_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+
+http_request_latency = {}  # {(method, route, status class): LatencyHistogram}
+http_response_size = {}    # {(method, route): LatencyHistogram over bytes}
+http_db_calls = {}         # {(method, route): LatencyHistogram over MongoDB commands per request}
+http_db_seconds = {}       # {(method, route): LatencyHistogram of time spent in MongoDB per request}
+db_command_latency = {}    # {command name: LatencyHistogram}
+db_command_failures = {}   # {command name: count}
+db_metrics_lock = threading.Lock()  # command events arrive on Motor's executor threads
+
+current_request_metrics: ContextVar = ContextVar("current_request_metrics", default=None)
+
+class RequestMetrics:
+    __slots__ = ("db_calls", "db_seconds")
+
+    def __init__(self):
+        self.db_calls = 0
+        self.db_seconds = 0.0
+
+def observe_metric(histograms: dict, key, value: float, buckets=None):
+    histogram = histograms.get(key)
+    if histogram is None:
+        histogram = histograms[key] = LatencyHistogram(buckets) if buckets else LatencyHistogram()
+    histogram.observe(value)
+
+class DBCommandListener(monitoring.CommandListener):
+    """Counts MongoDB commands per command name and for the request that issued them"""
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self.record(event.command_name, event.duration_micros / 1e6)
+
+    def failed(self, event):
+        self.record(event.command_name, event.duration_micros / 1e6)
+        with db_metrics_lock:
+            db_command_failures[event.command_name] = db_command_failures.get(event.command_name, 0) + 1
+
+    def record(self, command_name: str, seconds: float):
+        with db_metrics_lock:
+            observe_metric(db_command_latency, command_name, seconds)
+            request_metrics = current_request_metrics.get()
+            if request_metrics is not None:
+                request_metrics.db_calls += 1
+                request_metrics.db_seconds += seconds
+
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class PoolMetrics:
+    __slots__ = ("open", "in_use", "created", "closed", "checkout_failures", "cleared", "wait")
+
+    def __init__(self):
+        self.open = 0
+        self.in_use = 0
+        self.created = 0
+        self.closed = 0
+        self.checkout_failures = {}  # {reason: count}
+        self.cleared = 0
+        self.wait = LatencyHistogram(POOL_WAIT_BUCKETS)
+
+pool_metrics = {}  # {"host:port": PoolMetrics}
+
+class PoolListener(monitoring.ConnectionPoolListener):
+    """Open/in-use connections and checkout wait time per server.
+    Checkouts run synchronously on one executor thread, so the start time is kept thread-local."""
+    def __init__(self):
+        self.checkout_started = threading.local()
+
+    def pool(self, address) -> PoolMetrics:
+        key = f"{address[0]}:{address[1]}"
+        metrics = pool_metrics.get(key)
+        if metrics is None:
+            metrics = pool_metrics[key] = PoolMetrics()
+        return metrics
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with db_metrics_lock:
+            self.pool(event.address).cleared += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with db_metrics_lock:
+            metrics = self.pool(event.address)
+            metrics.open += 1
+            metrics.created += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with db_metrics_lock:
+            metrics = self.pool(event.address)
+            metrics.open -= 1
+            metrics.closed += 1
+
+    def connection_check_out_started(self, event):
+        self.checkout_started.value = time.perf_counter()
+
+    def connection_check_out_failed(self, event):
+        with db_metrics_lock:
+            failures = self.pool(event.address).checkout_failures
+            failures[event.reason] = failures.get(event.reason, 0) + 1
+
+    def connection_checked_out(self, event):
+        started = getattr(self.checkout_started, "value", None)
+        with db_metrics_lock:
+            metrics = self.pool(event.address)
+            metrics.in_use += 1
+            if started is not None:
+                metrics.wait.observe(time.perf_counter() - started)
+        self.checkout_started.value = None
+
+    def connection_checked_in(self, event):
+        with db_metrics_lock:
+            self.pool(event.address).in_use -= 1
+
+DB_EVENT_LISTENERS = [DBCommandListener(), PoolListener()] if METRICS_ENABLED else []
+
+class MetricsMiddleware:
+    """Latency, response size and MongoDB calls per route template (unmatched paths share one label)"""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        request_metrics = RequestMetrics()
+        token = current_request_metrics.set(request_metrics)
+        status_code = 500
+        response_size = 0
+        
+        async def metered_send(message):
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+        
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, metered_send)
+        finally:
+            elapsed = time.perf_counter() - start
+            current_request_metrics.reset(token)
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            key = (scope["method"], route)
+            observe_metric(http_request_latency, key + (f"{status_code // 100}xx",), elapsed)
+            observe_metric(http_response_size, key, response_size, RESPONSE_SIZE_BUCKETS)
+            with db_metrics_lock:
+                observe_metric(http_db_calls, key, request_metrics.db_calls, DB_CALLS_BUCKETS)
+                observe_metric(http_db_seconds, key, request_metrics.db_seconds)
+
+def prometheus_labels(**labels) -> str:
+    """'{name="value",...}' with escaped values, empty string without labels"""
+    if not labels:
+        return ""
+    escaped = (
+        name + '="' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for name, value in labels.items()
+    )
+    return "{" + ",".join(escaped) + "}"
+
+def prometheus_histogram(lines: List[str], name: str, histogram, **labels):
+    cumulative = 0
+    for bound, bucket_count in zip(list(histogram.buckets) + ["+Inf"], histogram.counts):
+        cumulative += bucket_count
+        lines.append(f"{name}_bucket{prometheus_labels(**labels, le=bound)} {cumulative}")
+    lines.append(f"{name}_sum{prometheus_labels(**labels)} {histogram.total}")
+    lines.append(f"{name}_count{prometheus_labels(**labels)} {histogram.count}")
+
+def render_prometheus_metrics() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    
+    lines.append("# TYPE http_request_duration_seconds histogram")
+    for (method, route, status_class), histogram in list(http_request_latency.items()):
+        prometheus_histogram(lines, "http_request_duration_seconds", histogram, method=method, route=route, status=status_class)
+    lines.append("# TYPE http_response_size_bytes histogram")
+    for (method, route), histogram in list(http_response_size.items()):
+        prometheus_histogram(lines, "http_response_size_bytes", histogram, method=method, route=route)
+    
+    with db_metrics_lock:
+        lines.append("# TYPE http_request_db_calls histogram")
+        for (method, route), histogram in list(http_db_calls.items()):
+            prometheus_histogram(lines, "http_request_db_calls", histogram, method=method, route=route)
+        lines.append("# TYPE http_request_db_duration_seconds histogram")
+        for (method, route), histogram in list(http_db_seconds.items()):
+            prometheus_histogram(lines, "http_request_db_duration_seconds", histogram, method=method, route=route)
+        lines.append("# TYPE mongodb_command_duration_seconds histogram")
+        for command_name, histogram in list(db_command_latency.items()):
+            prometheus_histogram(lines, "mongodb_command_duration_seconds", histogram, command=command_name)
+        lines.append("# TYPE mongodb_command_failures_total counter")
+        for command_name, count in list(db_command_failures.items()):
+            lines.append(f"mongodb_command_failures_total{prometheus_labels(command=command_name)} {count}")
+        
+        lines.append("# TYPE mongodb_pool_max_size gauge")
+        lines.append(f"mongodb_pool_max_size {MONGO_MAX_POOL_SIZE}")
+        for name, metric_type, value in (
+            ("mongodb_pool_open_connections", "gauge", lambda m: m.open),
+            ("mongodb_pool_in_use_connections", "gauge", lambda m: m.in_use),
+            ("mongodb_pool_utilization_ratio", "gauge", lambda m: m.in_use / MONGO_MAX_POOL_SIZE if MONGO_MAX_POOL_SIZE else 0),
+            ("mongodb_pool_connections_created_total", "counter", lambda m: m.created),
+            ("mongodb_pool_connections_closed_total", "counter", lambda m: m.closed),
+            ("mongodb_pool_cleared_total", "counter", lambda m: m.cleared),
+        ):
+            lines.append(f"# TYPE {name} {metric_type}")
+            for address, metrics in list(pool_metrics.items()):
+                lines.append(f"{name}{prometheus_labels(server=address)} {value(metrics)}")
+        lines.append("# TYPE mongodb_pool_checkout_failures_total counter")
+        for address, metrics in list(pool_metrics.items()):
+            for reason, count in list(metrics.checkout_failures.items()):
+                lines.append(f"mongodb_pool_checkout_failures_total{prometheus_labels(server=address, reason=reason)} {count}")
+        lines.append("# TYPE mongodb_pool_wait_seconds histogram")
+        for address, metrics in list(pool_metrics.items()):
+            prometheus_histogram(lines, "mongodb_pool_wait_seconds", metrics.wait, server=address)
+    
+    lines.append("# TYPE repository_operation_duration_seconds histogram")
+    for (collection_name, operation), histogram in list(repository_latency.items()):
+        prometheus_histogram(lines, "repository_operation_duration_seconds", histogram,
+                             collection=collection_name, operation=operation)
+    
+    render_socket_metrics(lines)
+    
+    lines.append("# TYPE event_loop_lag_seconds histogram")
+    prometheus_histogram(lines, "event_loop_lag_seconds", event_loop_lag)
+    lines.append("# TYPE event_loop_stalls_total counter")
+    lines.append(f"event_loop_stalls_total {loop_watchdog_state['stalls']}")
+    
+    lines.append("# TYPE emergency_first_ack_seconds histogram")
+    prometheus_histogram(lines, "emergency_first_ack_seconds", emergency_ack_latency)
+    return "\n".join(lines) + "\n"
+
 # Database connection - Use environment variable or fallback
 MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017/stadtwache_db")
 DB_NAME = os.getenv("DB_NAME", "stadtwache_db")
 
+# Connection pool - these keyword options override the same options given in MONGO_URL
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "10"))
+MONGO_CLIENT_OPTIONS = {
+    "maxPoolSize": MONGO_MAX_POOL_SIZE,
+    "minPoolSize": MONGO_MIN_POOL_SIZE,
+    "maxIdleTimeMS": int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000")),
+    "maxConnecting": int(os.getenv("MONGO_MAX_CONNECTING", "4")),
+    "waitQueueTimeoutMS": int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "10000")),
+    "serverSelectionTimeoutMS": int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000")),
+    "connectTimeoutMS": int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000")),
+    "socketTimeoutMS": int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "30000")),
+    # Unavailable compressors are skipped by pymongo with a warning (zstd needs zstandard, snappy python-snappy)
+    "compressors": os.getenv("MONGO_COMPRESSORS", "zstd,snappy,zlib"),
+    "readPreference": os.getenv("MONGO_READ_PREFERENCE", "primary"),
+    "retryWrites": True,
+    "retryReads": True,
+}
+
 # Handle both local and cloud MongoDB URLs
 if MONGO_URL.startswith("mongodb://localhost") or MONGO_URL.startswith("mongodb://127.0.0.1"):
     # Local development
-    client = AsyncIOMotorClient(MONGO_URL)
+    client = AsyncIOMotorClient(MONGO_URL, event_listeners=DB_EVENT_LISTENERS, **MONGO_CLIENT_OPTIONS)
     db = client[DB_NAME]
-    print(f"🔗 Connected to local MongoDB: {MONGO_URL}")
+    logger.info(f"🔗 Connected to local MongoDB: {MONGO_URL}")
 else:
     # Production/Cloud MongoDB
-    client = AsyncIOMotorClient(MONGO_URL)
+    client = AsyncIOMotorClient(MONGO_URL, event_listeners=DB_EVENT_LISTENERS, **MONGO_CLIENT_OPTIONS)
     db = client[DB_NAME]  
-    print(f"🔗 Connected to cloud MongoDB: {MONGO_URL[:20]}...")
+    logger.info(f"🔗 Connected to cloud MongoDB: {MONGO_URL[:20]}...")
+
+# Data access - handlers migrate from db.<collection> to these repositories one at a time;
+# handlers still writing through db call bump_version themselves
+repositories = Repositories(db)
+repository_latency = {}  # {(collection, operation): LatencyHistogram}
+
+def observe_repository_operation(collection_name: str, operation: str, seconds: float):
+    observe_metric(repository_latency, (collection_name, operation), seconds)
+
+if METRICS_ENABLED:
+    repositories.hooks.observers.append(observe_repository_operation)
+# Writes through a repository invalidate the collection's ETags
+repositories.hooks.write_hooks.append(lambda collection_name, operation: bump_version(collection_name))
+
+# Read routing - staleness-tolerant reads may be served by replica set secondaries
+READ_ROUTING_ENABLED = os.getenv("READ_ROUTING_ENABLED", "true").lower() == "true"
+MIN_MAX_STALENESS_SECONDS = 90  # smallest maxStalenessSeconds MongoDB accepts
+READ_MODES = {
+    "primary": read_preferences.Primary,
+    "primaryPreferred": read_preferences.PrimaryPreferred,
+    "secondary": read_preferences.Secondary,
+    "secondaryPreferred": read_preferences.SecondaryPreferred,
+    "nearest": read_preferences.Nearest,
+}
+# {endpoint: "mode:max staleness seconds"}, overridable via READ_POLICIES="admin_stats=secondary:120,..."
+READ_POLICIES = {
+    "admin_stats": "secondaryPreferred:120",
+    "report_folders": "secondaryPreferred:90",
+    "person_stats": "secondaryPreferred:120",
+    "emergency_broadcasts": "secondaryPreferred:90",
+    "attendance_list": "secondaryPreferred:90",
+    "team_status": "secondaryPreferred:90",
+    **parse_key_values(os.getenv("READ_POLICIES", ""))
+}
+read_databases = {}  # {endpoint: database handle with the endpoint's read preference}
+
+def parse_read_policy(endpoint: str, spec: str):
+    """(mode, max staleness seconds or None) from "mode:seconds" - ValueError for an invalid spec"""
+    mode, _, staleness = spec.partition(":")
+    if mode not in READ_MODES:
+        raise ValueError(f"Unknown read preference {mode!r} for {endpoint} in READ_POLICIES")
+    if mode == "primary" or not staleness:
+        return mode, None
+    try:
+        return mode, max(MIN_MAX_STALENESS_SECONDS, int(staleness))
+    except ValueError:
+        raise ValueError(f"Invalid max staleness {staleness!r} for {endpoint} in READ_POLICIES") from None
+
+# Parsed once at import - a bad READ_POLICIES value stops the worker at startup instead of failing requests
+PARSED_READ_POLICIES = {endpoint: parse_read_policy(endpoint, spec) for endpoint, spec in READ_POLICIES.items() if spec}
+
+def read_policy(endpoint: str):
+    """(mode, max staleness seconds or None) for an endpoint; primary when routing is off or unknown"""
+    if not READ_ROUTING_ENABLED:
+        return "primary", None
+    return PARSED_READ_POLICIES.get(endpoint, ("primary", None))
+
+def read_db(endpoint: str):
+    """Database handle routed according to READ_POLICIES[endpoint]"""
+    database = read_databases.get(endpoint)
+    if database is None:
+        mode, max_staleness = read_policy(endpoint)
+        if mode == "primary":
+            database = db
+        else:
+            preference = READ_MODES[mode](max_staleness=max_staleness or -1)
+            database = client.get_database(DB_NAME, read_preference=preference)
+        read_databases[endpoint] = database
+    return database
+
+def staleness_window(endpoint: str) -> int:
+    """ETag scope for routed reads - a response built on a lagging secondary expires after the staleness bound"""
+    mode, max_staleness = read_policy(endpoint)
+    if mode == "primary":
+        return 0
+    return int(time.time() // (max_staleness or MIN_MAX_STALENESS_SECONDS))
 
 # Test connection
 async def test_db_connection():
     try:
         await client.admin.command('ping')
-        print("✅ MongoDB connection successful!")
+        logger.info("✅ MongoDB connection successful!")
+        return True
     except Exception as e:
-        print(f"❌ MongoDB connection failed: {e}")
+        logger.error(f"❌ MongoDB connection failed: {e}")
+        return False
+
+async def warm_up_connection_pool():
+    """Open MONGO_MIN_POOL_SIZE connections before the first request instead of on demand"""
+    if not await test_db_connection():
+        return
+    # Concurrent pings need one pooled connection each
+    await asyncio.gather(
+        *(client.admin.command('ping') for _ in range(max(0, MONGO_MIN_POOL_SIZE - 1))),
+        return_exceptions=True
+    )
 
 # Helper function to convert ObjectId to string
 def serialize_mongo_data(data):
@@ -66,6 +509,316 @@ def serialize_mongo_data(data):
     else:
         return data
 
+def mongo_json_default(value):
+    """orjson hook for types it does not encode natively"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+class MongoJSONResponse(JSONResponse):
+    """JSON response encoded by orjson with native ObjectId/datetime support.
+
+    Returning it directly from a handler skips serialize_mongo_data and
+    FastAPI's jsonable_encoder pass.
+    """
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=mongo_json_default, option=orjson.OPT_NON_STR_KEYS)
+
+# Read paths trust documents written by this API; READ_PATH_VALIDATION=true re-enables per-item validation
+READ_PATH_VALIDATION = os.getenv("READ_PATH_VALIDATION", "false").lower() == "true"
+
+class ReadProjection:
+    """Model-shaped list responses without building and re-validating a model per document"""
+    def __init__(self, model):
+        self.model = model
+        self.projection = {"_id": 0, **{name: 1 for name in model.model_fields}}
+        self.defaults = {}
+        self.factories = {}
+        for name, field in model.model_fields.items():
+            if field.default_factory is not None:
+                self.factories[name] = field.default_factory
+            elif not field.is_required():
+                self.defaults[name] = field.default
+
+    def prepare(self, document: dict) -> dict:
+        """Fill defaults the model would add; the projection already dropped unknown fields"""
+        for name, factory in self.factories.items():
+            if name not in document:
+                document[name] = factory()
+        return {**self.defaults, **document}
+
+    def response(self, documents: List[dict], headers: Optional[dict] = None):
+        if READ_PATH_VALIDATION:
+            return MongoJSONResponse([self.model(**document).model_dump() for document in documents], headers=headers)
+        return MongoJSONResponse([self.prepare(document) for document in documents], headers=headers)
+
+# Conditional GET - per-collection change versions, bumped after every write through this process.
+# Versions live in process memory, so ETags are only valid for a single worker (see Dockerfile CMD).
+VERSION_EPOCH = uuid.uuid4().hex[:8]  # new ETags after a restart
+ONLINE_STATUS_ETAG_SECONDS = int(os.getenv("ONLINE_STATUS_ETAG_SECONDS", "30"))
+collection_versions = {}  # {collection: int}
+
+def bump_version(*collections: str):
+    for collection_name in collections:
+        collection_versions[collection_name] = collection_versions.get(collection_name, 0) + 1
+
+def list_etag(request: Request, collections, *scope) -> str:
+    """Weak ETag from path, query, caller scope and the versions of the collections read"""
+    parts = [request.url.path, str(request.query_params)]
+    parts.extend(str(item) for item in scope)
+    parts.extend(f"{name}:{collection_versions.get(name, 0)}" for name in collections)
+    digest = hashlib.md5("|".join(parts).encode("utf-8")).hexdigest()
+    return f'W/"{VERSION_EPOCH}-{digest}"'
+
+def etag_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+def not_modified(request: Request, etag: str, headers: Optional[dict] = None) -> Optional[Response]:
+    """304 response if the client's If-None-Match matches etag"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+    if if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers or etag_headers(etag))
+    return None
+
+# Response compression
+COMPRESSION_MINIMUM_SIZE = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024"))
+GZIP_COMPRESS_LEVEL = int(os.getenv("GZIP_COMPRESS_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+COMPRESSIBLE_CONTENT_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+class CompressionMiddleware:
+    """Brotli or gzip for complete responses above COMPRESSION_MINIMUM_SIZE; streamed bodies pass through"""
+    def __init__(self, app, minimum_size: int = COMPRESSION_MINIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        accepted = {
+            part.split(";")[0].strip().lower()
+            for part in Headers(scope=scope).get("accept-encoding", "").split(",")
+        }
+        encoding = "br" if "br" in accepted else "gzip" if "gzip" in accepted else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        
+        start_message = None
+        
+        async def compressing_send(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or start_message is None:
+                # e.g. http.response.pathsend - nothing to compress
+                if start_message is not None:
+                    start, start_message = start_message, None
+                    await send(start)
+                await send(message)
+                return
+            
+            start, start_message = start_message, None
+            headers = MutableHeaders(raw=start["headers"])
+            body = message.get("body", b"")
+            if (
+                message.get("more_body", False)
+                or len(body) < self.minimum_size
+                or "content-encoding" in headers
+                or not headers.get("content-type", "").startswith(COMPRESSIBLE_CONTENT_TYPES)
+            ):
+                await send(start)
+                await send(message)
+                return
+            
+            if encoding == "br":
+                body = brotli.compress(body, quality=BROTLI_QUALITY)
+            else:
+                body = gzip.compress(body, compresslevel=GZIP_COMPRESS_LEVEL)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+        
+        await self.app(scope, receive, compressing_send)
+
+def private_room_name(user1: str, user2: str) -> str:
+    """Consistent private room / conversation id regardless of order"""
+    users = sorted([user1, user2])
+    return f"private_{users[0]}_{users[1]}"
+
+MESSAGE_PREVIEW_LENGTH = 100
+
+def conversation_summary(message_data: dict) -> dict:
+    """Last-message fields stored on a conversation document"""
+    content = message_data.get("content") or ""
+    return {
+        "id": message_data.get("id"),
+        "sender_id": message_data.get("sender_id"),
+        "sender_name": message_data.get("sender_name"),
+        "message_type": message_data.get("message_type", "text"),
+        "preview": content[:MESSAGE_PREVIEW_LENGTH],
+        "timestamp": message_data.get("timestamp")
+    }
+
+# Private message read state - unread counters per recipient and conversation
+async def register_private_message(message_data: dict):
+    """Update unread counter and conversation summary for a freshly inserted private message"""
+    recipient_id = message_data["recipient_id"]
+    sender_id = message_data["sender_id"]
+    conversation_id = private_room_name(sender_id, recipient_id)
+    now = datetime.utcnow()
+    await db.unread_counters.update_one(
+        {"user_id": recipient_id, "conversation_id": conversation_id},
+        {
+            "$inc": {"count": 1},
+            "$set": {"peer_id": sender_id, "updated_at": now}
+        },
+        upsert=True
+    )
+    # Pipeline update: the preview only moves forward, so late or backdated inserts keep the newer one
+    timestamp = message_data.get("timestamp") or now
+    await db.conversations.update_one(
+        {"id": conversation_id},
+        [{"$set": {
+            "last_message": {"$cond": [
+                {"$gte": [timestamp, "$last_message_at"]},  # a missing last_message_at sorts lowest
+                {"$literal": conversation_summary(message_data)},
+                "$last_message"
+            ]},
+            "last_message_at": {"$max": ["$last_message_at", timestamp]},
+            "updated_at": now,
+            "participants": {"$ifNull": ["$participants", sorted([sender_id, recipient_id])]},
+            "created_at": {"$ifNull": ["$created_at", now]},
+            "message_count": {"$add": [{"$ifNull": ["$message_count", 0]}, 1]}
+        }}],
+        upsert=True
+    )
+
+async def backfill_conversations():
+    """Build conversation documents from existing private messages (runs once on an empty collection)"""
+    if await db.conversations.estimated_document_count() > 0:
+        return 0
+    
+    pipeline = [
+        {"$match": {"recipient_id": {"$ne": None}}},
+        {"$sort": {"timestamp": -1}},
+        {"$group": {
+            "_id": {"$cond": [
+                {"$lt": ["$sender_id", "$recipient_id"]},
+                ["$sender_id", "$recipient_id"],
+                ["$recipient_id", "$sender_id"]
+            ]},
+            "last_message": {"$first": "$$ROOT"},
+            "message_count": {"$sum": 1},
+            "created_at": {"$last": "$timestamp"}
+        }}
+    ]
+    operations = []
+    async for group in db.messages.aggregate(pipeline, allowDiskUse=True):
+        participants = group["_id"]
+        last_message = group["last_message"]
+        operations.append(UpdateOne(
+            {"id": private_room_name(*participants)},
+            {"$setOnInsert": {
+                "participants": participants,
+                "last_message": conversation_summary(last_message),
+                "last_message_at": last_message.get("timestamp"),
+                "message_count": group["message_count"],
+                "created_at": group["created_at"],
+                "updated_at": datetime.utcnow()
+            }},
+            upsert=True
+        ))
+    
+    if operations:
+        await db.conversations.bulk_write(operations, ordered=False)
+    return len(operations)
+
+async def backfill_unread_counters():
+    """Build unread counters from unread private messages stored before counters existed (runs once)"""
+    marker_id = "unread_counters_backfill"
+    if await db.migrations.find_one({"_id": marker_id}):
+        return 0
+    
+    pipeline = [
+        {"$match": {"recipient_id": {"$ne": None}, "is_read": False}},
+        {"$group": {"_id": {"recipient_id": "$recipient_id", "sender_id": "$sender_id"}, "count": {"$sum": 1}}}
+    ]
+    now = datetime.utcnow()
+    operations = []
+    async for group in db.messages.aggregate(pipeline, allowDiskUse=True):
+        recipient_id, sender_id = group["_id"]["recipient_id"], group["_id"]["sender_id"]
+        # $set, not $inc - a run interrupted before the marker was written can safely repeat
+        operations.append(UpdateOne(
+            {"user_id": recipient_id, "conversation_id": private_room_name(sender_id, recipient_id)},
+            {"$set": {"count": group["count"], "peer_id": sender_id, "updated_at": now}},
+            upsert=True
+        ))
+    
+    if operations:
+        await db.unread_counters.bulk_write(operations, ordered=False)
+    await db.migrations.update_one({"_id": marker_id}, {"$setOnInsert": {"completed_at": now}}, upsert=True)
+    return len(operations)
+
+async def recount_unread(user_id: str, peer_id: str) -> int:
+    """Recalculate one unread counter from the (recipient_id, is_read, sender_id) index"""
+    count = await db.messages.count_documents({
+        "recipient_id": user_id,
+        "is_read": False,
+        "sender_id": peer_id
+    })
+    await db.unread_counters.update_one(
+        {"user_id": user_id, "conversation_id": private_room_name(peer_id, user_id)},
+        {"$set": {"count": count, "peer_id": peer_id, "updated_at": datetime.utcnow()}},
+        upsert=True
+    )
+    return count
+
+async def ensure_indexes():
+    """Create indexes used by the hot query paths"""
+    # Private message read state
+    await db.messages.create_index([("recipient_id", 1), ("is_read", 1), ("sender_id", 1), ("timestamp", -1)])
+    await db.messages.create_index([("recipient_id", 1), ("is_read", 1), ("timestamp", -1)])
+    await db.unread_counters.create_index([("user_id", 1), ("conversation_id", 1)], unique=True)
+    # Conversation list
+    await db.conversations.create_index("id", unique=True)
+    await db.conversations.create_index([("participants", 1), ("last_message_at", -1)])
+    # Notification inbox and delivery queue
+    await db.notifications.create_index([("recipient_id", 1), ("is_read", 1), ("created_at", -1)])
+    await db.notifications.create_index([("delivery_status", 1), ("recipient_id", 1), ("created_at", 1)])
+    await db.notifications.create_index("id", unique=True)
+    # Incremental sync
+    for collection_name, field in SYNC_COLLECTIONS.items():
+        await db[collection_name].create_index([(field, 1), ("id", 1)])
+    await db.tombstones.create_index([("collection", 1), ("deleted_at", 1), ("id", 1)])
+    await db.tombstones.create_index("deleted_at", expireAfterSeconds=TOMBSTONE_RETENTION_DAYS * 86400)
+    # Idempotency keys expire after IDEMPOTENCY_TTL_SECONDS
+    await db.idempotency_keys.create_index("created_at", expireAfterSeconds=IDEMPOTENCY_TTL_SECONDS)
+    # Recency queries and the archiver
+    for collection_name in RETENTION_POLICIES:
+        await db[collection_name].create_index("timestamp")
+    # Older private messages were stored without is_read - give them an indexable value
+    await db.messages.update_many(
+        {"recipient_id": {"$ne": None}, "is_read": {"$exists": False}},
+        {"$set": {"is_read": False}}
+    )
+    # ... and without updated_at, which /sync pages messages by since reads change them
+    await db.messages.update_many(
+        {"updated_at": {"$exists": False}},
+        [{"$set": {"updated_at": "$timestamp"}}]
+    )
+
 # Security
 SECRET_KEY = os.environ.get("SECRET_KEY", "your-secret-key-here-change-in-production")
 ALGORITHM = "HS256"
@@ -74,15 +827,420 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 Tage
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
+class SocketJSON:
+    """json module for Socket.IO packets - orjson with the same hook as MongoJSONResponse (datetimes, ObjectIds)"""
+    @staticmethod
+    def dumps(obj, **kwargs):
+        return orjson.dumps(obj, default=mongo_json_default).decode("utf-8")
+
+    @staticmethod
+    def loads(data, **kwargs):
+        return orjson.loads(data)
+
+# Socket.IO metrics - event rates/latency, emit fan-out, room sizes and outbound queue backpressure
+SOCKET_QUEUE_SAMPLE_SECONDS = float(os.getenv("SOCKET_QUEUE_SAMPLE_SECONDS", "5"))
+SOCKET_SLOW_CONSUMER_QUEUE = int(os.getenv("SOCKET_SLOW_CONSUMER_QUEUE", "50"))     # packets waiting
+SOCKET_SLOW_CONSUMER_SAMPLES = int(os.getenv("SOCKET_SLOW_CONSUMER_SAMPLES", "3"))  # consecutive growing samples
+FANOUT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+socket_event_latency = {}  # {event: LatencyHistogram} - handler duration, count = events received
+socket_event_errors = {}   # {event: count}
+socket_emit_fanout = {}    # {event: LatencyHistogram over recipients per emit}
+socket_queue_sizes = {}    # {sid: outbound packets waiting at the last sample} - exported as aggregates only
+socket_queue_growth = {}   # {sid: consecutive samples with a growing queue}
+slow_consumers = set()     # sids currently flagged as slow consumers
+slow_consumer_detections = 0
+
+class InstrumentedAsyncServer(socketio.AsyncServer):
+    """AsyncServer recording the number of recipients of every emit"""
+    async def emit(self, event, data=None, to=None, room=None, namespace=None, **kwargs):
+        if METRICS_ENABLED:
+            observe_metric(socket_emit_fanout, event, count_participants(namespace or '/', to or room), FANOUT_BUCKETS)
+        await super().emit(event, data, to=to, room=room, namespace=namespace, **kwargs)
+
+def count_participants(namespace: str, room) -> int:
+    """Recipients of an emit from the manager's room sizes - O(rooms), not O(sockets)
+
+    A socket in several target rooms is counted once per room, so multi-room emits are an upper bound.
+    """
+    rooms = sio.manager.rooms.get(namespace, {})
+    targets = room if isinstance(room, (list, tuple, set)) else [room]
+    return sum(len(rooms.get(target, ())) for target in targets)
+
+def socket_event(handler):
+    """@sio.event with per-event count, error and latency metrics"""
+    event = handler.__name__
+    
+    @functools.wraps(handler)
+    async def instrumented(*args):
+        start = time.perf_counter()
+        try:
+            return await handler(*args)
+        except Exception:
+            socket_event_errors[event] = socket_event_errors.get(event, 0) + 1
+            raise
+        finally:
+            observe_metric(socket_event_latency, event, time.perf_counter() - start)
+    
+    return sio.event(instrumented if METRICS_ENABLED else handler)
+
+def outbound_queue_size(eio_sid: str) -> int:
+    """Packets queued by engine.io for one client but not yet written to its transport"""
+    eio_socket = sio.eio.sockets.get(eio_sid)
+    queue = getattr(eio_socket, "queue", None)
+    return queue.qsize() if queue is not None else 0
+
+def sample_outbound_queues():
+    """Flag clients whose outbound queue is large and kept growing for SOCKET_SLOW_CONSUMER_SAMPLES samples"""
+    global slow_consumer_detections
+    try:
+        participants = list(sio.manager.get_participants('/', None))
+    except KeyError:
+        participants = []
+    
+    sizes, growth = {}, {}
+    for sid, eio_sid in participants:
+        size = outbound_queue_size(eio_sid)
+        sizes[sid] = size
+        growth[sid] = socket_queue_growth.get(sid, 0) + 1 if size > socket_queue_sizes.get(sid, 0) else 0
+        
+        if size >= SOCKET_SLOW_CONSUMER_QUEUE and growth[sid] >= SOCKET_SLOW_CONSUMER_SAMPLES:
+            if sid not in slow_consumers:
+                slow_consumers.add(sid)
+                slow_consumer_detections += 1
+                logger.warning(f"Slow Socket.IO consumer {sid} (user {user_sockets.get(sid)}): {size} packets queued")
+        elif size < SOCKET_SLOW_CONSUMER_QUEUE:
+            slow_consumers.discard(sid)
+    
+    socket_queue_sizes.clear()
+    socket_queue_sizes.update(sizes)
+    socket_queue_growth.clear()
+    socket_queue_growth.update(growth)
+    slow_consumers.intersection_update(sizes)
+
+async def socket_backpressure_loop():
+    """Background task sampling outbound queues every SOCKET_QUEUE_SAMPLE_SECONDS"""
+    while True:
+        await asyncio.sleep(SOCKET_QUEUE_SAMPLE_SECONDS)
+        sample_outbound_queues()
+
+def render_socket_metrics(lines: List[str]):
+    lines.append("# TYPE socketio_event_duration_seconds histogram")
+    for event, histogram in list(socket_event_latency.items()):
+        prometheus_histogram(lines, "socketio_event_duration_seconds", histogram, event=event)
+    lines.append("# TYPE socketio_event_errors_total counter")
+    for event, count in list(socket_event_errors.items()):
+        lines.append(f"socketio_event_errors_total{prometheus_labels(event=event)} {count}")
+    lines.append("# TYPE socketio_emit_recipients histogram")
+    for event, histogram in list(socket_emit_fanout.items()):
+        prometheus_histogram(lines, "socketio_emit_recipients", histogram, event=event)
+    
+    # Named rooms only - every client also sits in a room named after its own sid.
+    # Per-user and private rooms are summed per kind to keep the label set bounded.
+    rooms = sio.manager.rooms.get('/', {})
+    all_sids = rooms.get(None, {})
+    lines.append("# TYPE socketio_connected_clients gauge")
+    lines.append(f"socketio_connected_clients {len(all_sids)}")
+    room_members = {}
+    for room, members in list(rooms.items()):
+        if room is None or room in all_sids:
+            continue
+        label = room.split("_", 1)[0] + "_*" if room.startswith(("user_", "private_")) else room
+        room_members[label] = room_members.get(label, 0) + len(members)
+    lines.append("# TYPE socketio_room_members gauge")
+    for room, members in room_members.items():
+        lines.append(f"socketio_room_members{prometheus_labels(room=room)} {members}")
+    
+    queue_sizes = list(socket_queue_sizes.values())
+    lines.append("# TYPE socketio_outbound_queue_packets gauge")
+    lines.append(f"socketio_outbound_queue_packets {sum(queue_sizes)}")
+    lines.append("# TYPE socketio_outbound_queue_packets_max gauge")
+    lines.append(f"socketio_outbound_queue_packets_max {max(queue_sizes, default=0)}")
+    lines.append("# TYPE socketio_slow_consumers gauge")
+    lines.append(f"socketio_slow_consumers {len(slow_consumers)}")
+    lines.append("# TYPE socketio_slow_consumer_detections_total counter")
+    lines.append(f"socketio_slow_consumer_detections_total {slow_consumer_detections}")
+
 # Socket.IO server
-sio = socketio.AsyncServer(async_mode='asgi', cors_allowed_origins='*')
+sio = InstrumentedAsyncServer(async_mode='asgi', cors_allowed_origins='*', json=SocketJSON)
 
 # Online users tracking
 online_users = {}  # {user_id: {"last_seen": datetime, "socket_id": str, "username": str}}
 user_sockets = {}  # {socket_id: user_id}
+background_tasks = set()  # running asyncio tasks, cancelled on shutdown
+SHUTDOWN_TASK_TIMEOUT_SECONDS = float(os.getenv("SHUTDOWN_TASK_TIMEOUT_SECONDS", "5"))
+
+def spawn_background_task(coro):
+    """Start a task and keep a reference until it finishes"""
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+# Heartbeat persistence - heartbeats are coalesced in memory and flushed in one bulk write
+HEARTBEAT_FLUSH_INTERVAL_SECONDS = float(os.getenv("HEARTBEAT_FLUSH_INTERVAL_SECONDS", "15"))
+HEARTBEAT_MIN_PERSIST_DELTA_SECONDS = float(os.getenv("HEARTBEAT_MIN_PERSIST_DELTA_SECONDS", "10"))
+pending_heartbeats = {}    # {user_id: datetime} - not yet written to db.users
+persisted_heartbeats = {}  # {user_id: datetime} - last value written to db.users
+ONLINE_THRESHOLD = timedelta(minutes=2)  # no activity for longer = offline
+
+def record_heartbeat(user_id: str, now: datetime):
+    """Queue last_activity for the next flush if it moved far enough since the last write"""
+    last_persisted = persisted_heartbeats.get(user_id)
+    if last_persisted and (now - last_persisted).total_seconds() < HEARTBEAT_MIN_PERSIST_DELTA_SECONDS:
+        return
+    previous = pending_heartbeats.get(user_id) or last_persisted
+    pending_heartbeats[user_id] = now
+    # /users/by-status overlays pending heartbeats; only a change of online state invalidates it,
+    # newer last_activity values are picked up when the ETag rolls over (ONLINE_STATUS_ETAG_SECONDS)
+    if previous is None or now - previous >= ONLINE_THRESHOLD:
+        bump_version("users")
+
+def get_last_activity(user_id: str, stored: Optional[datetime]) -> Optional[datetime]:
+    """Newest known activity - pending heartbeats win over the stored value"""
+    pending = pending_heartbeats.get(user_id)
+    if pending and (not isinstance(stored, datetime) or pending > stored):
+        return pending
+    return stored
+
+def requeue_heartbeats(batch: Dict[str, datetime]):
+    """Put an unwritten batch back unless a newer heartbeat arrived meanwhile"""
+    for user_id, timestamp in batch.items():
+        if user_id not in pending_heartbeats:
+            pending_heartbeats[user_id] = timestamp
+
+async def flush_heartbeats() -> int:
+    """Write all pending heartbeats with a single bulk_write"""
+    if not pending_heartbeats:
+        return 0
+    batch = dict(pending_heartbeats)
+    pending_heartbeats.clear()
+    operations = [
+        UpdateOne({"id": user_id}, {"$max": {"last_activity": timestamp}})
+        for user_id, timestamp in batch.items()
+    ]
+    try:
+        # No bump_version - /users/by-status already showed these values through the pending overlay
+        await db.users.bulk_write(operations, ordered=False)
+    except asyncio.CancelledError:
+        # Cancelled mid-write (shutdown) - the final flush picks the batch up again
+        requeue_heartbeats(batch)
+        raise
+    except Exception as e:
+        requeue_heartbeats(batch)
+        logger.error(f"❌ Heartbeat flush error: {e}")
+        return 0
+    persisted_heartbeats.update(batch)
+    return len(batch)
+
+async def heartbeat_flush_loop():
+    """Background task flushing coalesced heartbeats every HEARTBEAT_FLUSH_INTERVAL_SECONDS"""
+    while True:
+        await asyncio.sleep(HEARTBEAT_FLUSH_INTERVAL_SECONDS)
+        await flush_heartbeats()
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (seconds) with Prometheus-style cumulative buckets"""
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total += seconds
+        self.count += 1
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Upper bucket bound containing the q-th quantile (0 < q <= 1)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return self.buckets[i] if i < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def snapshot(self) -> dict:
+        cumulative = 0
+        buckets = {}
+        for bound, bucket_count in zip(list(self.buckets) + ["+Inf"], self.counts):
+            cumulative += bucket_count
+            buckets[str(bound)] = cumulative
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "buckets": buckets,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99)
+        }
+
+# Event-loop watchdog - loop lag histogram and stack of whatever blocks the loop
+LOOP_WATCHDOG_ENABLED = os.getenv("LOOP_WATCHDOG_ENABLED", "true").lower() == "true"
+LOOP_LAG_INTERVAL_SECONDS = float(os.getenv("LOOP_LAG_INTERVAL_SECONDS", "0.25"))
+LOOP_STALL_THRESHOLD_SECONDS = float(os.getenv("LOOP_STALL_THRESHOLD_SECONDS", "0.2"))
+LOOP_DEBUG = os.getenv("LOOP_DEBUG", "false").lower() == "true"  # asyncio debug mode, logs every slow callback
+LOOP_LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+event_loop_lag = LatencyHistogram(LOOP_LAG_BUCKETS)
+loop_watchdog_state = {"last_tick": None, "loop_thread_id": None, "stalls": 0}
+loop_watchdog_stop = threading.Event()
+
+async def loop_lag_monitor():
+    """Background task: how late does a LOOP_LAG_INTERVAL_SECONDS sleep wake up"""
+    loop = asyncio.get_running_loop()
+    while True:
+        loop_watchdog_state["last_tick"] = time.monotonic()
+        expected = loop.time() + LOOP_LAG_INTERVAL_SECONDS
+        await asyncio.sleep(LOOP_LAG_INTERVAL_SECONDS)
+        event_loop_lag.observe(max(0.0, loop.time() - expected))
+
+def loop_watchdog():
+    """Thread logging the event-loop thread's stack once per stall longer than LOOP_STALL_THRESHOLD_SECONDS"""
+    reported_tick = None
+    while not loop_watchdog_stop.wait(LOOP_STALL_THRESHOLD_SECONDS / 2):
+        last_tick = loop_watchdog_state["last_tick"]
+        if last_tick is None or last_tick == reported_tick:
+            continue
+        stalled = time.monotonic() - last_tick - LOOP_LAG_INTERVAL_SECONDS
+        if stalled < LOOP_STALL_THRESHOLD_SECONDS:
+            continue
+        
+        reported_tick = last_tick
+        loop_watchdog_state["stalls"] += 1
+        frame = sys._current_frames().get(loop_watchdog_state["loop_thread_id"])
+        stack = "".join(traceback.format_stack(frame)) if frame else ""
+        logger.warning(f"Event loop blocked for more than {stalled:.3f}s", extra={"stall_seconds": round(stalled, 3), "stack": stack})
+
+def start_loop_watchdog():
+    loop = asyncio.get_running_loop()
+    if LOOP_DEBUG:
+        loop.set_debug(True)
+        loop.slow_callback_duration = LOOP_STALL_THRESHOLD_SECONDS
+    loop_watchdog_state["loop_thread_id"] = threading.get_ident()
+    loop_watchdog_stop.clear()
+    spawn_background_task(loop_lag_monitor())
+    threading.Thread(target=loop_watchdog, name="loop-watchdog", daemon=True).start()
+
+# Profiling - opt-in sampling profiler for the event-loop thread, output in collapsed-stack (flamegraph) format
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")  # X-Profile header value enabling single-request profiles
+PROFILING_MAX_SECONDS = float(os.getenv("PROFILING_MAX_SECONDS", "60"))
+PROFILING_KEEP_RESULTS = int(os.getenv("PROFILING_KEEP_RESULTS", "20"))
+
+profiling_lock = threading.Lock()  # one sampler at a time
+profile_results: "OrderedDict[str, str]" = OrderedDict()  # {profile id: collapsed stacks}, single-request profiles
+
+class StackSampler:
+    """Samples one thread's stack every interval seconds from a helper thread.
+    mode "wall" counts every sample, "cpu" only samples in which the thread used CPU time.
+    With root_frame only stacks running inside that frame are kept - on the event loop thread this
+    restricts the profile to one task, since a coroutine's frame is only on the stack while its task runs."""
+    def __init__(self, thread_id: int, interval: float = 0.005, mode: str = "wall", root_frame=None):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.mode = mode
+        self.root_frame = root_frame
+        self.counts = {}
+        self.samples = 0
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="stack-sampler", daemon=True)
+        try:
+            self.cpu_clock = time.pthread_getcpuclockid(thread_id)
+        except (AttributeError, OSError):
+            self.cpu_clock = None
+
+    def cpu_time(self) -> float:
+        return time.clock_gettime(self.cpu_clock) if self.cpu_clock is not None else 0.0
+
+    def run(self):
+        last_cpu = self.cpu_time()
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            if self.mode == "cpu":
+                cpu = self.cpu_time()
+                if self.cpu_clock is not None and cpu == last_cpu:
+                    continue
+                last_cpu = cpu
+            
+            stack = []
+            inside_root = self.root_frame is None
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                inside_root = inside_root or frame is self.root_frame
+                frame = frame.f_back
+            if not inside_root:
+                continue  # another task was running
+            key = ";".join(reversed(stack))
+            self.counts[key] = self.counts.get(key, 0) + 1
+            self.samples += 1
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self) -> str:
+        """Collapsed stacks, one 'frame;frame;frame count' line per distinct stack"""
+        self.stopped.set()
+        self.thread.join()
+        return "\n".join(f"{stack} {count}" for stack, count in sorted(self.counts.items())) + "\n"
+
+def store_profile_result(profile_id: str, collapsed: str):
+    profile_results[profile_id] = collapsed
+    while len(profile_results) > PROFILING_KEEP_RESULTS:
+        profile_results.popitem(last=False)
+
+class ProfilingMiddleware:
+    """Profiles a single request when its X-Profile header matches PROFILING_TOKEN;
+    the result is fetched via /api/admin/profile/{id} from the X-Profile-Id response header"""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or not PROFILING_TOKEN
+                or not secrets.compare_digest(Headers(scope=scope).get("x-profile", ""), PROFILING_TOKEN)
+                or not profiling_lock.acquire(blocking=False)):
+            await self.app(scope, receive, send)
+            return
+        
+        profile_id = str(uuid.uuid4())
+        
+        async def profiled_send(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("X-Profile-Id", profile_id)
+            await send(message)
+        
+        # Only samples taken while this request's task runs - concurrent requests stay out of the profile.
+        # Work the request hands to the thread pool is not sampled.
+        sampler = StackSampler(threading.get_ident(), interval=0.001, root_frame=sys._getframe()).start()
+        try:
+            await self.app(scope, receive, profiled_send)
+        finally:
+            store_profile_result(profile_id, sampler.stop())
+            profiling_lock.release()
+
+# Emergency broadcast delivery - per-recipient ack tracking and re-send
+EMERGENCY_RESEND_INTERVAL_SECONDS = float(os.getenv("EMERGENCY_RESEND_INTERVAL_SECONDS", "5"))
+EMERGENCY_MAX_RESENDS = int(os.getenv("EMERGENCY_MAX_RESENDS", "6"))
+emergency_deliveries = {}  # {broadcast_id: {"created_at": datetime, "pending": set, "acked": dict, "first_ack_at": datetime}}
+emergency_ack_latency = LatencyHistogram()
 
 # Create FastAPI app
-app = FastAPI()
+app = FastAPI(default_response_class=MongoJSONResponse)
 api_router = APIRouter(prefix="/api")
 
 # Wrap FastAPI app with Socket.IO
@@ -190,7 +1348,10 @@ class Message(BaseModel):
     recipient_id: Optional[str] = None  # None for group messages
     channel: str = "general"  # general, emergency, incidents
     timestamp: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: Optional[datetime] = None  # change feed field for /sync, see SYNC_COLLECTIONS
     message_type: str = "text"  # text, location, image
+    is_read: bool = False
+    read_at: Optional[datetime] = None
 
 class MessageCreate(BaseModel):
     content: str
@@ -198,6 +1359,26 @@ class MessageCreate(BaseModel):
     channel: str = "general"
     message_type: str = "text"
 
+class MessagesReadRequest(BaseModel):
+    peer_id: str  # other participant of the private conversation
+    up_to: Optional[datetime] = None  # mark everything up to this timestamp, default now
+
+class SyncCursor(BaseModel):
+    updated_at: Optional[datetime] = None  # high-water mark returned by the previous sync
+    id: Optional[str] = None
+
+class SyncRequest(BaseModel):
+    collections: Dict[str, SyncCursor]  # {"incidents": {...}, "persons": {...}, "messages": {...}, "reports": {...}}
+    limit: int = 200
+
+class BatchOperation(BaseModel):
+    op: str  # checkin, location, message, incident_update
+    data: Dict[str, Any] = {}
+    idempotency_key: Optional[str] = None
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation]
+
 class LocationUpdate(BaseModel):
     user_id: str
     location: Dict[str, float]
@@ -338,13 +1519,17 @@ class ShiftCreate(BaseModel):
     start_time: str
     end_time: str
 
+INCIDENT_READ = ReadProjection(Incident)
+MESSAGE_READ = ReadProjection(Message)
+PERSON_READ = ReadProjection(Person)
+
 # Security functions
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
     try:
         return pwd_context.verify(plain_password, hashed_password)
     except Exception as e:
-        print(f"Password verification error: {e}")
+        logger.error(f"Password verification error: {e}")
         return False
 
 def get_password_hash(password: str) -> str:
@@ -382,34 +1567,48 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     except JWTError as e:
         raise credentials_exception
     
-    # Try to find user by different methods
-    user = None
-    
-    # First, try to find by ID (if the identifier looks like a UUID)
-    if user_identifier and '-' in user_identifier and len(user_identifier) == 36:
-        user = await db.users.find_one({"id": user_identifier})
-    
-    # If not found by ID, try by email
-    if user is None:
-        user = await db.users.find_one({"email": user_identifier})
-    
-    # If still not found and we have a separate user_id, try that
-    if user is None and user_id:
-        user = await db.users.find_one({"id": user_id})
-    
+    # The subject may be a user id or an email; user_id is the fallback
+    user = await repositories.users.find_by_identifier(user_identifier, user_id)
     if user is None:
         raise credentials_exception
     
     return User(**user)
 
 # Socket.IO events
-@sio.event
-async def connect(sid, environ):
-    print(f"🔗 Client {sid} connected")
-
-@sio.event
-async def disconnect(sid):
-    print(f"🔌 Client {sid} disconnected")
+async def authenticate_socket(token: Optional[str]) -> Optional[dict]:
+    """User document for a JWT sent over Socket.IO, None if the token is missing or invalid"""
+    if not token:
+        return None
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    if payload.get("sub") is None:
+        return None
+    return await repositories.users.find_by_identifier(payload["sub"], payload.get("user_id"))
+
+async def authenticated_session(sid, token: Optional[str] = None) -> Optional[dict]:
+    """{"user_id", "role"} of an authenticated socket, authenticating with token if the session has none yet"""
+    session = await sio.get_session(sid)
+    if "user_id" in session:
+        return session
+    user = await authenticate_socket(token)
+    if user is None:
+        return None
+    session = {"user_id": user["id"], "role": user["role"]}
+    await sio.save_session(sid, session)
+    return session
+
+@socket_event
+async def connect(sid, environ, auth=None):
+    user = await authenticate_socket((auth or {}).get("token") if isinstance(auth, dict) else None)
+    if user is not None:
+        await sio.save_session(sid, {"user_id": user["id"], "role": user["role"]})
+    logger.debug("Socket connected", extra={"sid": sid, "user_id": user["id"] if user else None})
+
+@socket_event
+async def disconnect(sid, reason=None):
+    logger.debug("Socket disconnected", extra={"sid": sid})
     # Remove from user_sockets mapping
     if sid in user_sockets:
         user_id = user_sockets[sid]
@@ -418,33 +1617,34 @@ async def disconnect(sid):
         if user_id in online_users:
             online_users[user_id]["socket_id"] = None
 
-@sio.event
+@socket_event
 async def join_user_room(sid, user_id):
     """Join user to their personal room for notifications"""
     await sio.enter_room(sid, f"user_{user_id}")
     user_sockets[sid] = user_id
     if user_id in online_users:
         online_users[user_id]["socket_id"] = sid
-    print(f"👤 User {user_id} joined personal room")
+    # Deliver notifications queued while the user was offline
+    notification_wakeup.set()
+    logger.debug("User joined personal room", extra={"sid": sid, "user_id": user_id})
 
-@sio.event
+@socket_event
 async def join_channel(sid, channel):
     """Join a channel room"""
     await sio.enter_room(sid, f"channel_{channel}")
-    print(f"📺 Socket {sid} joined channel: {channel}")
+    logger.debug("Socket joined channel", extra={"sid": sid, "channel": channel})
 
-@sio.event
+@socket_event
 async def join_private_room(sid, data):
     """Join private chat room between two users"""
     user1 = data.get('user1')
     user2 = data.get('user2')
     # Create consistent room name regardless of order
-    users = sorted([user1, user2])
-    room_name = f"private_{users[0]}_{users[1]}"
+    room_name = private_room_name(user1, user2)
     await sio.enter_room(sid, room_name)
-    print(f"💬 Socket {sid} joined private room: {room_name}")
+    logger.debug("Socket joined private room", extra={"sid": sid, "room": room_name})
 
-@sio.event
+@socket_event
 async def send_message(sid, data):
     """Handle real-time message sending"""
     try:
@@ -455,25 +1655,28 @@ async def send_message(sid, data):
         message_type = data.get('message_type', 'text')
         
         # Create message object
+        now = datetime.utcnow()
         message_data = {
             "id": str(uuid.uuid4()),
             "content": content,
             "sender_id": sender_id,
             "channel": channel,
-            "timestamp": datetime.utcnow(),
-            "created_at": datetime.utcnow(),
+            "timestamp": now,
+            "created_at": now,
+            "updated_at": now,
             "message_type": message_type
         }
         
         if recipient_id:
             # Private message
             message_data["recipient_id"] = recipient_id
+            message_data["is_read"] = False
             # Save to database
             await db.messages.insert_one(message_data)
+            await register_private_message(message_data)
             
             # Send to private room
-            users = sorted([sender_id, recipient_id])
-            room_name = f"private_{users[0]}_{users[1]}"
+            room_name = private_room_name(sender_id, recipient_id)
             await sio.emit('new_message', message_data, room=room_name)
             
             # Send notification to recipient's personal room
@@ -484,18 +1687,40 @@ async def send_message(sid, data):
             # Send to channel room
             await sio.emit('new_message', message_data, room=f"channel_{channel}")
             
-        print(f"📩 Message sent: {content[:50]}...")
+        logger.debug("Message sent", extra={"message_id": message_data["id"], "channel": channel, "private": bool(recipient_id)})
         
     except Exception as e:
-        print(f"❌ Error sending message: {e}")
+        logger.error(f"Error sending message: {e}", extra={"sid": sid})
+
+@socket_event
+async def subscribe_events(sid, data):
+    """Subscribe to domain events of collections, e.g. {"collections": ["incidents", "persons"], "token": "..."}
+
+    Needs an authenticated socket (auth token on connect or "token" here); only collections
+    the user's role may read are joined. Messages arrive through the user and channel rooms.
+    """
+    data = data or {}
+    session = await authenticated_session(sid, data.get('token'))
+    if session is None:
+        await sio.emit('subscribe_error', {'detail': 'Authentication required'}, to=sid)
+        return
+    
+    subscribed, denied = [], []
+    for collection_name in data.get('collections', []):
+        if session["role"] in EVENT_BUS_ROLES.get(collection_name, ()):
+            await sio.enter_room(sid, f"events_{collection_name}")
+            subscribed.append(collection_name)
+        else:
+            denied.append(collection_name)
+    await sio.emit('events_subscribed', {'collections': subscribed, 'denied': denied}, to=sid)
 
-@sio.event
+@socket_event
 async def join_room(sid, data):
     room = data.get('room', 'general')
     await sio.enter_room(sid, room)
     await sio.emit('joined_room', {'room': room}, room=sid)
 
-@sio.event
+@socket_event
 async def location_update(sid, data):
     # Save location update
     location_data = {
@@ -504,10 +1729,131 @@ async def location_update(sid, data):
         "timestamp": datetime.utcnow()
     }
     await db.locations.insert_one(location_data)
+    logger.info("GPS update", extra={"sample": "gps", "user_id": location_data["user_id"], "sid": sid})
     
     # Broadcast to all connected clients
     await sio.emit('location_updated', location_data)
 
+@socket_event
+async def emergency_ack(sid, data):
+    """Client acknowledges receipt of an emergency broadcast - only from an authenticated socket"""
+    data = data or {}
+    broadcast_id = data.get('broadcast_id')
+    session = await authenticated_session(sid, data.get('token'))
+    if not isinstance(broadcast_id, str) or session is None:
+        return
+    user_id = session["user_id"]
+    
+    now = datetime.utcnow()
+    delivery = emergency_deliveries.get(broadcast_id)
+    if delivery:
+        if user_id in delivery["acked"]:
+            return
+        delivery["pending"].discard(user_id)
+        delivery["acked"][user_id] = now
+        if delivery["first_ack_at"] is None:
+            delivery["first_ack_at"] = now
+            emergency_ack_latency.observe((now - delivery["created_at"]).total_seconds())
+    
+    # Entries instead of a field per user id - ids never become part of a field path
+    await db.emergency_broadcasts.update_one(
+        {"id": broadcast_id, "acked.user_id": {"$ne": user_id}},
+        {"$addToSet": {"acked": {"user_id": user_id, "at": now}}}
+    )
+
+async def emit_emergency_broadcast(broadcast: dict, user_ids):
+    """Push an emergency broadcast to the personal rooms of the given users"""
+    payload = serialize_mongo_data({k: v for k, v in broadcast.items() if k != "_id"})
+    payload["timestamp"] = broadcast["timestamp"].isoformat()
+    rooms = [f"user_{user_id}" for user_id in user_ids]
+    if rooms:
+        await sio.emit('emergency_broadcast', payload, to=rooms)
+
+async def resend_unacknowledged(broadcast: dict):
+    """Re-send the broadcast to recipients that have not acknowledged it yet"""
+    broadcast_id = broadcast["id"]
+    try:
+        for attempt in range(EMERGENCY_MAX_RESENDS):
+            await asyncio.sleep(EMERGENCY_RESEND_INTERVAL_SECONDS)
+            delivery = emergency_deliveries.get(broadcast_id)
+            if not delivery or not delivery["pending"]:
+                break
+            await emit_emergency_broadcast({**broadcast, "resend": attempt + 1}, delivery["pending"])
+    finally:
+        delivery = emergency_deliveries.pop(broadcast_id, None)
+        if delivery:
+            await db.emergency_broadcasts.update_one(
+                {"id": broadcast_id},
+                {"$set": {
+                    "delivery.acknowledged": len(delivery["acked"]),
+                    "delivery.unacknowledged": sorted(delivery["pending"])
+                }}
+            )
+
+async def dispatch_emergency_broadcast(broadcast: dict):
+    """Fan out an emergency broadcast to every connected user before any other work"""
+    recipients = {user_id for user_id in user_sockets.values() if user_id != broadcast["sender_id"]}
+    emergency_deliveries[broadcast["id"]] = {
+        "created_at": broadcast["timestamp"],
+        "pending": set(recipients),
+        "acked": {},
+        "first_ack_at": None
+    }
+    await emit_emergency_broadcast(broadcast, recipients)
+    spawn_background_task(resend_unacknowledged(broadcast))
+    return len(recipients)
+
+# Notification delivery - pending notifications are a durable queue in db.notifications
+NOTIFICATION_POLL_INTERVAL_SECONDS = float(os.getenv("NOTIFICATION_POLL_INTERVAL_SECONDS", "5"))
+NOTIFICATION_BATCH_WINDOW_SECONDS = float(os.getenv("NOTIFICATION_BATCH_WINDOW_SECONDS", "0.25"))
+NOTIFICATION_BATCH_SIZE = int(os.getenv("NOTIFICATION_BATCH_SIZE", "500"))
+notification_wakeup = asyncio.Event()
+
+async def dispatch_pending_notifications() -> int:
+    """Deliver pending notifications of connected users, one emit per recipient"""
+    online_ids = list(set(user_sockets.values()))
+    if not online_ids:
+        return 0
+    
+    pending = await db.notifications.find(
+        {"delivery_status": "pending", "recipient_id": {"$in": online_ids}},
+        {"_id": 0}
+    ).sort("created_at", 1).limit(NOTIFICATION_BATCH_SIZE).to_list(NOTIFICATION_BATCH_SIZE)
+    if not pending:
+        return 0
+    
+    by_recipient = {}
+    for notification in pending:
+        by_recipient.setdefault(notification["recipient_id"], []).append(notification)
+    
+    for recipient_id, notifications in by_recipient.items():
+        await sio.emit('notifications', serialize_mongo_data({
+            "notifications": notifications,
+            "count": len(notifications)
+        }), room=f"user_{recipient_id}")
+    
+    await db.notifications.update_many(
+        {"id": {"$in": [n["id"] for n in pending]}},
+        {"$set": {"delivery_status": "delivered", "delivered_at": datetime.utcnow()}}
+    )
+    return len(pending)
+
+async def notification_dispatcher_loop():
+    """Background worker - woken by new notifications and user joins, polls as fallback"""
+    while True:
+        try:
+            await asyncio.wait_for(notification_wakeup.wait(), timeout=NOTIFICATION_POLL_INTERVAL_SECONDS)
+            # Let a burst for the same recipient accumulate into one emit
+            await asyncio.sleep(NOTIFICATION_BATCH_WINDOW_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        notification_wakeup.clear()
+        try:
+            while await dispatch_pending_notifications() >= NOTIFICATION_BATCH_SIZE:
+                pass
+        except Exception as e:
+            logger.error(f"Notification dispatch error: {str(e)}")
+
 # API Routes
 @api_router.post("/auth/register", response_model=User)
 async def register_user(user_data: UserCreate):
@@ -539,6 +1885,7 @@ async def register_user(user_data: UserCreate):
     
     # Insert user into database
     await db.users.insert_one(user_dict)
+    bump_version("users")
     
     # Return user without password
     user_dict.pop('hashed_password')
@@ -593,6 +1940,7 @@ async def update_profile(user_updates: UserUpdate, current_user: User = Depends(
         {"id": current_user.id}, 
         {"$set": update_data}
     )
+    bump_version("users")
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="User not found")
@@ -616,6 +1964,7 @@ async def assign_incident(incident_id: str, current_user: User = Depends(get_cur
     }
     
     result = await db.incidents.update_one({"id": incident_id}, {"$set": updates})
+    bump_version("incidents")
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Incident not found")
@@ -632,22 +1981,33 @@ async def assign_incident(incident_id: str, current_user: User = Depends(get_cur
     
     return incident_obj
 
+USERS_BY_STATUS_PROJECTION = {
+    "_id": 0, "id": 1, "username": 1, "phone": 1, "service_number": 1, "rank": 1,
+    "department": 1, "status": 1, "last_activity": 1, "patrol_team": 1,
+    "assigned_district": 1, "photo": 1
+}
+
 @api_router.get("/users/by-status")
-async def get_users_by_status(current_user: User = Depends(get_current_user)):
+async def get_users_by_status(request: Request, current_user: User = Depends(get_current_user)):
     """Get users grouped by their work status with online information"""
-    users = await db.users.find().to_list(100)
+    # Online state also changes with time alone, so the ETag rolls over every ONLINE_STATUS_ETAG_SECONDS
+    etag = list_etag(request, ("users",), int(time.time() // ONLINE_STATUS_ETAG_SECONDS))
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    
+    users = await repositories.users.find({}, USERS_BY_STATUS_PROJECTION, limit=100)
     now = datetime.utcnow()
-    offline_threshold = timedelta(minutes=2)
     
     users_by_status = {}
     for user_doc in users:
         user_status = user_doc.get("status", "Im Dienst")
         
         # Check if user is online (last activity within 2 minutes)
-        last_activity = user_doc.get("last_activity")
+        last_activity = get_last_activity(user_doc.get("id"), user_doc.get("last_activity"))
         is_online = False
         if last_activity and isinstance(last_activity, datetime):
-            is_online = now - last_activity < offline_threshold
+            is_online = now - last_activity < ONLINE_THRESHOLD
         
         if user_status not in users_by_status:
             users_by_status[user_status] = []
@@ -669,7 +2029,7 @@ async def get_users_by_status(current_user: User = Depends(get_current_user)):
         }
         users_by_status[user_status].append(user_data)
     
-    return serialize_mongo_data(users_by_status)
+    return MongoJSONResponse(users_by_status, headers=etag_headers(etag))
 
 @api_router.delete("/messages/{message_id}")
 async def delete_message(message_id: str, current_user: User = Depends(get_current_user)):
@@ -688,6 +2048,7 @@ async def delete_message(message_id: str, current_user: User = Depends(get_curre
     
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Message not found")
+    await record_tombstone("messages", message, current_user.id)
     
     # Notify about message deletion
     await sio.emit('message_deleted', {'message_id': message_id, 'channel': message['channel']})
@@ -714,8 +2075,14 @@ class ReportCreate(BaseModel):
     content: str
     shift_date: str
 
+REPORT_READ = ReadProjection(Report)
+
 @api_router.post("/reports", response_model=Report)
-async def create_report(report_data: ReportCreate, current_user: User = Depends(get_current_user)):
+async def create_report(report_data: ReportCreate, request: Request, current_user: User = Depends(get_current_user)):
+    idempotency_key, replay = await idempotent_replay(request, current_user.id, "create_report")
+    if replay is not None:
+        return replay
+    
     report_dict = report_data.dict()
     report_dict['author_id'] = current_user.id
     report_dict['author_name'] = current_user.username
@@ -724,11 +2091,11 @@ async def create_report(report_data: ReportCreate, current_user: User = Depends(
     report_dict['updated_at'] = datetime.utcnow()
     
     report_obj = Report(**report_dict)
-    result = await db.reports.insert_one(report_obj.dict())
+    result = await repositories.reports.insert(report_obj.dict())
     if not result.inserted_id:
         raise HTTPException(status_code=500, detail="Failed to create report")
     
-    return report_obj
+    return await remember_response(idempotency_key, report_obj)
 
 @api_router.put("/reports/{report_id}", response_model=Report)
 async def update_report(
@@ -757,6 +2124,7 @@ async def update_report(
             {"id": report_id},
             {"$set": update_data}
         )
+        bump_version("reports")
         
         if result.matched_count == 0:
             raise HTTPException(status_code=404, detail="Report not found")
@@ -789,22 +2157,29 @@ async def delete_report(report_id: str, current_user: User = Depends(get_current
     
     # Delete the report
     result = await db.reports.delete_one({"id": report_id})
+    bump_version("reports")
     
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Report not found")
+    await record_tombstone("reports", report, current_user.id)
     
     return {"status": "success", "message": "Report deleted"}
 
 @api_router.get("/reports", response_model=List[Report])
-async def get_reports(current_user: User = Depends(get_current_user)):
+async def get_reports(request: Request, current_user: User = Depends(get_current_user)):
+    etag = list_etag(request, ("reports",), current_user.role, current_user.id)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    
     if current_user.role == UserRole.ADMIN:
         # Admin can see all reports
-        reports = await db.reports.find().sort("created_at", -1).to_list(100)
+        reports = await db.reports.find({}, REPORT_READ.projection).sort("created_at", -1).to_list(100)
     else:
         # Users can only see their own reports
-        reports = await db.reports.find({"author_id": current_user.id}).sort("created_at", -1).to_list(100)
+        reports = await db.reports.find({"author_id": current_user.id}, REPORT_READ.projection).sort("created_at", -1).to_list(100)
     
-    return [Report(**serialize_mongo_data(report)) for report in reports]
+    return REPORT_READ.response(reports, headers=etag_headers(etag))
 
 @api_router.put("/users/{user_id}")
 async def update_user(user_id: str, updates: UserUpdate, current_user: User = Depends(get_current_user)):
@@ -816,6 +2191,7 @@ async def update_user(user_id: str, updates: UserUpdate, current_user: User = De
     update_data['updated_at'] = datetime.utcnow()
     
     result = await db.users.update_one({"id": user_id}, {"$set": update_data})
+    bump_version("users")
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="User not found")
@@ -833,6 +2209,7 @@ async def delete_user(user_id: str, current_user: User = Depends(get_current_use
         raise HTTPException(status_code=400, detail="Cannot delete yourself")
     
     result = await db.users.delete_one({"id": user_id})
+    bump_version("users")
     
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="User not found")
@@ -846,9 +2223,11 @@ async def delete_incident(incident_id: str, current_user: User = Depends(get_cur
         raise HTTPException(status_code=403, detail="Not authorized")
     
     result = await db.incidents.delete_one({"id": incident_id})
+    bump_version("incidents")
     
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Incident not found")
+    await record_tombstone("incidents", {"id": incident_id}, current_user.id)
     
     return {"status": "success", "message": "Incident deleted"}
 
@@ -884,9 +2263,11 @@ async def complete_incident(incident_id: str, current_user: User = Depends(get_c
     
     # Delete the incident from active incidents
     result = await db.incidents.delete_one({"id": incident_id})
+    bump_version("incidents", "reports")
     
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Incident not found")
+    await record_tombstone("incidents", {"id": incident_id}, current_user.id, reason="completed")
     
     # Notify about incident completion
     await sio.emit('incident_completed', {
@@ -897,22 +2278,28 @@ async def complete_incident(incident_id: str, current_user: User = Depends(get_c
     
     return {"status": "success", "message": "Incident completed and archived", "archive_id": archive_report['id']}
 
+REPORT_FOLDER_PROJECTION = {
+    "_id": 0, "id": 1, "title": 1, "content": 1, "author_name": 1,
+    "shift_date": 1, "created_at": 1, "status": 1
+}
+
 @api_router.get("/reports/folders")
-async def get_report_folders(current_user: User = Depends(get_current_user)):
+async def get_report_folders(request: Request, current_user: User = Depends(get_current_user)):
     """Get all report folders and their contents"""
-    if current_user.role == UserRole.ADMIN:
-        # Admin can see all reports
-        reports = await db.reports.find().sort("created_at", -1).to_list(1000)
-    else:
-        # Users can only see their own reports
-        reports = await db.reports.find({"author_id": current_user.id}).sort("created_at", -1).to_list(1000)
+    etag = list_etag(request, ("reports",), current_user.role, current_user.id, staleness_window("report_folders"))
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    
+    # Admin can see all reports, users only their own
+    author_id = None if current_user.role == UserRole.ADMIN else current_user.id
+    reports = await repositories.reports.using(read_db("report_folders")).list_by_author(author_id, REPORT_FOLDER_PROJECTION)
     
     # Organize reports by folders (year/month)
     folders = {}
     for report in reports:
         created_date = report['created_at']
         if isinstance(created_date, str):
-            from datetime import datetime
             created_date = datetime.fromisoformat(created_date.replace('Z', '+00:00'))
         
         year = str(created_date.year)
@@ -933,7 +2320,7 @@ async def get_report_folders(current_user: User = Depends(get_current_user)):
             "status": report.get("status", "submitted")
         })
     
-    return folders
+    return MongoJSONResponse(folders, headers=etag_headers(etag))
 
 @api_router.put("/reports/{report_id}", response_model=Report)
 async def update_report(report_id: str, updated_data: ReportCreate, current_user: User = Depends(get_current_user)):
@@ -976,6 +2363,7 @@ async def update_report(report_id: str, updated_data: ReportCreate, current_user
             "$push": {"edit_history": edit_history_entry}
         }
     )
+    bump_version("reports")
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Report not found")
@@ -986,8 +2374,12 @@ async def update_report(report_id: str, updated_data: ReportCreate, current_user
 
 # Person Database Endpoints
 @api_router.post("/persons", response_model=Person)
-async def create_person(person_data: PersonCreate, current_user: User = Depends(get_current_user)):
+async def create_person(person_data: PersonCreate, request: Request, current_user: User = Depends(get_current_user)):
     """Erstelle eine neue Person in der Datenbank"""
+    idempotency_key, replay = await idempotent_replay(request, current_user.id, "create_person")
+    if replay is not None:
+        return replay
+    
     # Allow all authenticated users to create person entries (removed admin restriction)
     # Old restriction: Only police and admin can create person entries
     # if current_user.role not in [UserRole.POLICE, UserRole.ADMIN]:
@@ -998,22 +2390,23 @@ async def create_person(person_data: PersonCreate, current_user: User = Depends(
     person_dict['created_by_name'] = current_user.username
     person_obj = Person(**person_dict)
     
-    await db.persons.insert_one(person_obj.dict())
+    await repositories.persons.insert(person_obj.dict())
     
     # Notify all users about new person entry
     await sio.emit('new_person', person_obj.dict())
     
-    return person_obj
+    return await remember_response(idempotency_key, person_obj)
 
 @api_router.get("/persons", response_model=List[Person])
-async def get_persons(status: Optional[str] = None, current_user: User = Depends(get_current_user)):
+async def get_persons(request: Request, status: Optional[str] = None, current_user: User = Depends(get_current_user)):
     """Lade alle Personen oder nach Status gefiltert"""
-    query = {"is_active": True}
-    if status:
-        query["status"] = status
+    etag = list_etag(request, ("persons",))
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
     
-    persons = await db.persons.find(query).sort("created_at", -1).to_list(100)
-    return [Person(**person) for person in persons]
+    persons = await repositories.persons.list_active(status, PERSON_READ.projection)
+    return PERSON_READ.response(persons, headers=etag_headers(etag))
 
 @api_router.get("/persons/{person_id}", response_model=Person)
 async def get_person(person_id: str, current_user: User = Depends(get_current_user)):
@@ -1035,6 +2428,7 @@ async def update_person(person_id: str, updates: PersonUpdate, current_user: Use
     update_data['updated_at'] = datetime.utcnow()
     
     result = await db.persons.update_one({"id": person_id}, {"$set": update_data})
+    bump_version("persons")
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Person not found")
@@ -1057,19 +2451,22 @@ async def delete_person(person_id: str, current_user: User = Depends(get_current
         {"id": person_id}, 
         {"$set": {"is_active": False, "updated_at": datetime.utcnow()}}
     )
+    bump_version("persons")
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Person not found")
+    await record_tombstone("persons", {"id": person_id}, current_user.id, reason="archived")
     
     return {"status": "success", "message": "Person archived"}
 
 @api_router.get("/persons/stats/overview")
 async def get_person_stats(current_user: User = Depends(get_current_user)):
     """Statistiken über Personen-Datenbank"""
-    total_persons = await db.persons.count_documents({"is_active": True})
-    missing_persons = await db.persons.count_documents({"is_active": True, "status": "vermisst"})
-    wanted_persons = await db.persons.count_documents({"is_active": True, "status": "gesucht"})
-    found_persons = await db.persons.count_documents({"is_active": True, "status": "gefunden"})
+    counts = await repositories.persons.using(read_db("person_stats")).count_by_status(["vermisst", "gesucht", "gefunden"])
+    total_persons = counts["total"]
+    missing_persons = counts["vermisst"]
+    wanted_persons = counts["gesucht"]
+    found_persons = counts["gefunden"]
     
     return {
         "total_persons": total_persons,
@@ -1106,6 +2503,10 @@ async def broadcast_emergency_alert(
             "status": "sent"
         }
         
+        # Push to all connected users first - storing and logging must not delay the alarm
+        recipient_count = await dispatch_emergency_broadcast(broadcast_dict)
+        broadcast_dict["recipient_count"] = recipient_count
+        
         # Store in database
         result = await db.emergency_broadcasts.insert_one(broadcast_dict)
         
@@ -1130,15 +2531,13 @@ async def broadcast_emergency_alert(
         else:
             location_info = f" - GPS: {location_status}"
             
-        logger.info(f"🚨 EMERGENCY BROADCAST: {broadcast_dict['id']} by {current_user.username}{location_info}")
-        
-        # TODO: Implement real-time notification to all users via WebSocket/Push notifications
-        # This would trigger push notifications to all team members with GPS coordinates
+        logger.info(f"🚨 EMERGENCY BROADCAST: {broadcast_dict['id']} by {current_user.username}{location_info} to {recipient_count} users")
         
         return {
             "success": True,
             "broadcast_id": broadcast_dict["id"],
             "message": "Emergency alert broadcasted to all team members",
+            "recipient_count": recipient_count,
             "location_transmitted": location_data is not None,
             "location_status": location_status,
             "timestamp": broadcast_dict["timestamp"].isoformat()
@@ -1154,28 +2553,27 @@ async def get_emergency_broadcasts(current_user: User = Depends(get_current_user
     try:
         # Get recent emergency broadcasts (last 24 hours)
         yesterday = datetime.utcnow() - timedelta(days=1)
-        cursor = db.emergency_broadcasts.find(
-            {"timestamp": {"$gte": yesterday}}
+        reader = read_db("emergency_broadcasts")
+        cursor = reader.emergency_broadcasts.find(
+            {"timestamp": {"$gte": yesterday}}, {"_id": 0}
         ).sort("timestamp", -1).limit(50)
         
-        broadcasts = await cursor.to_list(length=50)
-        
-        result = []
-        for broadcast in broadcasts:
-            if '_id' in broadcast:
-                del broadcast['_id']
-            result.append(broadcast)
+        result = await cursor.to_list(length=50)
         
         logger.info(f"Retrieved {len(result)} emergency broadcasts")
-        return result
+        return MongoJSONResponse(result)
         
     except Exception as e:
         logger.error(f"Error retrieving emergency broadcasts: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 @api_router.post("/incidents", response_model=Incident)
-async def create_incident(incident_data: IncidentCreate, current_user: User = Depends(get_current_user)):
+async def create_incident(incident_data: IncidentCreate, request: Request, current_user: User = Depends(get_current_user)):
     """Create a new incident with geocoding support"""
+    idempotency_key, replay = await idempotent_replay(request, current_user.id, "create_incident")
+    if replay is not None:
+        return replay
+    
     incident_dict = incident_data.dict()
     incident_dict["id"] = str(uuid.uuid4())
     incident_dict["created_at"] = datetime.utcnow()
@@ -1203,13 +2601,18 @@ async def create_incident(incident_data: IncidentCreate, current_user: User = De
             "lng": 7.2954
         }
     
-    await db.incidents.insert_one(incident_dict)
-    return Incident(**incident_dict)
+    await repositories.incidents.insert(incident_dict)
+    return await remember_response(idempotency_key, Incident(**incident_dict))
 
 @api_router.get("/incidents", response_model=List[Incident])
-async def get_incidents(current_user: User = Depends(get_current_user)):
-    incidents = await db.incidents.find().sort("created_at", -1).to_list(100)
-    return [Incident(**incident) for incident in incidents]
+async def get_incidents(request: Request, current_user: User = Depends(get_current_user)):
+    etag = list_etag(request, ("incidents",))
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    
+    incidents = await repositories.incidents.list_recent(INCIDENT_READ.projection)
+    return INCIDENT_READ.response(incidents, headers=etag_headers(etag))
 
 @api_router.get("/incidents/{incident_id}", response_model=Incident)
 async def get_incident(incident_id: str, current_user: User = Depends(get_current_user)):
@@ -1226,12 +2629,10 @@ async def update_incident(incident_id: str, updates: Dict[str, Any], current_use
     #     raise HTTPException(status_code=403, detail="Not authorized")
     
     updates['updated_at'] = datetime.utcnow()
-    result = await db.incidents.update_one({"id": incident_id}, {"$set": updates})
-    
-    if result.matched_count == 0:
+    if not await repositories.incidents.update_fields(incident_id, updates):
         raise HTTPException(status_code=404, detail="Incident not found")
     
-    incident = await db.incidents.find_one({"id": incident_id})
+    incident = await repositories.incidents.get_by_id(incident_id)
     incident_obj = Incident(**incident)
     
     # Notify about incident update
@@ -1243,10 +2644,10 @@ async def update_incident(incident_id: str, updates: Dict[str, Any], current_use
 async def get_messages(channel: str = "general", current_user: User = Depends(get_current_user)):
     """Get messages from specified channel"""
     try:
-        messages = await db.messages.find({"channel": channel}).sort("timestamp", 1).limit(100).to_list(100)
-        return serialize_mongo_data(messages)
+        messages = await repositories.messages.list_channel(channel)
+        return MongoJSONResponse(messages)
     except Exception as e:
-        print(f"❌ Fehler beim Laden der Nachrichten: {str(e)}")
+        logger.error(f"❌ Fehler beim Laden der Nachrichten: {str(e)}")
         return []
 
 @api_router.get("/messages/private", response_model=List[Message])
@@ -1257,28 +2658,147 @@ async def get_private_messages(unread_only: bool = False, current_user: User = D
         "recipient_id": current_user.id
     }
     
-    # If unread_only is true, add filter for unread messages
+    # If unread_only is true, add filter for unread messages (equality match uses the index)
     if unread_only:
-        query["is_read"] = {"$ne": True}
+        query["is_read"] = False
+    
+    messages = await db.messages.find(query, MESSAGE_READ.projection).sort("timestamp", -1).limit(50).to_list(50)
+    return MESSAGE_READ.response(messages)
+
+@api_router.get("/messages/unread-counts")
+async def get_unread_counts(current_user: User = Depends(get_current_user)):
+    """All unread private message counters of the current user in one call (badges)"""
+    counters = await db.unread_counters.find(
+        {"user_id": current_user.id, "count": {"$gt": 0}},
+        {"_id": 0, "conversation_id": 1, "peer_id": 1, "count": 1}
+    ).to_list(None)
+    
+    return {
+        "total": sum(counter["count"] for counter in counters),
+        "conversations": counters
+    }
+
+@api_router.get("/conversations")
+async def get_conversations(
+    limit: int = 20,
+    before: Optional[datetime] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """Private conversations of the current user, newest first, with last message and unread count"""
+    limit = max(1, min(limit, 100))
+    query = {"participants": current_user.id}
+    if before:
+        query["last_message_at"] = {"$lt": before}
+    
+    conversations = await db.conversations.find(query, {"_id": 0}).sort(
+        "last_message_at", -1
+    ).limit(limit).to_list(limit)
+    
+    # Unread counts for this page in one query
+    counters = await db.unread_counters.find(
+        {"user_id": current_user.id, "conversation_id": {"$in": [c["id"] for c in conversations]}},
+        {"_id": 0, "conversation_id": 1, "count": 1}
+    ).to_list(None)
+    unread_by_conversation = {c["conversation_id"]: c["count"] for c in counters}
+    
+    for conversation in conversations:
+        conversation["peer_id"] = next(
+            (p for p in conversation["participants"] if p != current_user.id), current_user.id
+        )
+        conversation["unread_count"] = unread_by_conversation.get(conversation["id"], 0)
+    
+    next_before = None
+    if len(conversations) == limit:
+        next_before = conversations[-1]["last_message_at"]
+    
+    return {"conversations": conversations, "next_before": next_before}
+
+@api_router.post("/messages/read")
+async def mark_messages_read(read_request: MessagesReadRequest, current_user: User = Depends(get_current_user)):
+    """Mark all private messages from peer_id up to a timestamp as read"""
+    now = datetime.utcnow()
+    up_to = read_request.up_to or now
+    
+    result = await db.messages.update_many(
+        {
+            "recipient_id": current_user.id,
+            "is_read": False,
+            "sender_id": read_request.peer_id,
+            "timestamp": {"$lte": up_to}
+        },
+        {"$set": {"is_read": True, "read_at": now, "updated_at": now}}
+    )
+    unread = await recount_unread(current_user.id, read_request.peer_id)
+    
+    if result.modified_count:
+        # Read receipt for the sender
+        await sio.emit('messages_read', {
+            'reader_id': current_user.id,
+            'conversation_id': private_room_name(read_request.peer_id, current_user.id),
+            'up_to': up_to.isoformat(),
+            'read_at': now.isoformat()
+        }, room=f"user_{read_request.peer_id}")
+    
+    return {"status": "success", "marked_read": result.modified_count, "unread": unread}
+
+@api_router.post("/messages/{message_id}/read")
+async def mark_message_read(message_id: str, current_user: User = Depends(get_current_user)):
+    """Mark a single private message as read"""
+    now = datetime.utcnow()
+    message = await db.messages.find_one_and_update(
+        {"id": message_id, "recipient_id": current_user.id, "is_read": False},
+        {"$set": {"is_read": True, "read_at": now, "updated_at": now}},
+        projection={"_id": 0, "sender_id": 1}
+    )
+    
+    if message is None:
+        exists = await db.messages.count_documents({"id": message_id, "recipient_id": current_user.id}, limit=1)
+        if not exists:
+            raise HTTPException(status_code=404, detail="Message not found")
+        return {"status": "success", "marked_read": 0}
+    
+    sender_id = message["sender_id"]
+    await db.unread_counters.update_one(
+        {
+            "user_id": current_user.id,
+            "conversation_id": private_room_name(sender_id, current_user.id),
+            "count": {"$gt": 0}
+        },
+        {"$inc": {"count": -1}, "$set": {"updated_at": now}}
+    )
+    
+    # Read receipt for the sender
+    await sio.emit('messages_read', {
+        'reader_id': current_user.id,
+        'conversation_id': private_room_name(sender_id, current_user.id),
+        'message_id': message_id,
+        'read_at': now.isoformat()
+    }, room=f"user_{sender_id}")
     
-    messages = await db.messages.find(query).sort("timestamp", -1).limit(50).to_list(50)
-    return [Message(**message) for message in messages]
+    return {"status": "success", "marked_read": 1}
 
 @api_router.post("/messages", response_model=Message)
-async def send_message(message_data: MessageCreate, current_user: User = Depends(get_current_user)):
+async def send_message(message_data: MessageCreate, request: Request, current_user: User = Depends(get_current_user)):
+    idempotency_key, replay = await idempotent_replay(request, current_user.id, "send_message")
+    if replay is not None:
+        return replay
+    
     message_dict = message_data.dict()
     message_dict['sender_id'] = current_user.id
     message_dict['sender_name'] = current_user.username  # Add sender name
-    message_dict['timestamp'] = datetime.utcnow()  # Add timestamp
-    message_dict['created_at'] = datetime.utcnow()  # Add created_at for compatibility
+    now = datetime.utcnow()
+    message_dict['timestamp'] = message_dict['updated_at'] = now  # Add timestamp
+    message_dict['created_at'] = now  # Add created_at for compatibility
     message_obj = Message(**message_dict)
     
-    await db.messages.insert_one(message_obj.dict())
+    await repositories.messages.insert(message_obj.dict())
+    if message_obj.recipient_id:
+        await register_private_message(message_obj.dict())
     
     # Emit to socket room
     await sio.emit('new_message', message_obj.dict(), room=message_data.channel)
     
-    return message_obj
+    return await remember_response(idempotency_key, message_obj)
 
 @api_router.post("/notifications")
 async def create_notification(
@@ -1301,16 +2821,61 @@ async def create_notification(
             "content": content,
             "type": notification_type,
             "is_read": False,
+            "delivery_status": "pending",
+            "delivered_at": None,
             "created_at": datetime.utcnow(),
             "timestamp": datetime.utcnow()
         }
         
         await db.notifications.insert_one(notification_dict)
-        return {"success": True, "message": "Notification created"}
+        notification_wakeup.set()
+        return {"success": True, "message": "Notification created", "notification_id": notification_dict["id"]}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create notification: {str(e)}")
 
+@api_router.get("/notifications")
+async def get_notifications(
+    unread_only: bool = False,
+    limit: int = 50,
+    before: Optional[datetime] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """Notification inbox of the current user, newest first (page with before=<created_at>)"""
+    limit = max(1, min(limit, 200))
+    # is_read is always part of the filter so the (recipient_id, is_read, created_at) index serves the sort
+    query = {
+        "recipient_id": current_user.id,
+        "is_read": False if unread_only else {"$in": [False, True]}
+    }
+    if before:
+        query["created_at"] = {"$lt": before}
+    
+    notifications = await db.notifications.find(query, {"_id": 0}).sort(
+        "created_at", -1
+    ).limit(limit).to_list(limit)
+    return notifications
+
+@api_router.put("/notifications/read-all")
+async def mark_all_notifications_read(current_user: User = Depends(get_current_user)):
+    """Mark every notification of the current user as read"""
+    result = await db.notifications.update_many(
+        {"recipient_id": current_user.id, "is_read": False},
+        {"$set": {"is_read": True, "read_at": datetime.utcnow()}}
+    )
+    return {"status": "success", "marked_read": result.modified_count}
+
+@api_router.put("/notifications/{notification_id}/read")
+async def mark_notification_read(notification_id: str, current_user: User = Depends(get_current_user)):
+    """Mark a single notification as read"""
+    result = await db.notifications.update_one(
+        {"id": notification_id, "recipient_id": current_user.id},
+        {"$set": {"is_read": True, "read_at": datetime.utcnow()}}
+    )
+    if result.matched_count == 0:
+        raise HTTPException(status_code=404, detail="Notification not found")
+    return {"status": "success"}
+
 @api_router.get("/locations/live")
 async def get_live_locations(current_user: User = Depends(get_current_user)):
     """Get live officer locations"""
@@ -1346,8 +2911,8 @@ async def get_users(current_user: User = Depends(get_current_user)):
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    users = await db.users.find().to_list(100)
-    return serialize_mongo_data(users)
+    users = await db.users.find({}, {"_id": 0}).to_list(100)
+    return MongoJSONResponse(users)
 
 @api_router.get("/locations/live")
 async def get_live_locations(current_user: User = Depends(get_current_user)):
@@ -1378,7 +2943,8 @@ async def get_live_locations(current_user: User = Depends(get_current_user)):
 @api_router.post("/locations/update")
 async def update_location(location_data: LocationUpdate, current_user: User = Depends(get_current_user)):
     location_data.user_id = current_user.id
-    await db.locations.insert_one(location_data.dict())
+    await repositories.locations.record(location_data.dict())
+    logger.info("GPS update", extra={"sample": "gps", "user_id": current_user.id})
     
     # Emit location update
     await sio.emit('location_updated', location_data.dict())
@@ -1391,10 +2957,11 @@ async def get_admin_stats(current_user: User = Depends(get_current_user)):
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    total_users = await db.users.count_documents({})
-    total_incidents = await db.incidents.count_documents({})
-    open_incidents = await db.incidents.count_documents({"status": "open"})
-    total_messages = await db.messages.count_documents({})
+    reader = read_db("admin_stats")
+    total_users = await reader.users.count_documents({})
+    total_incidents = await reader.incidents.count_documents({})
+    open_incidents = await reader.incidents.count_documents({"status": "open"})
+    total_messages = await reader.messages.count_documents({})
     
     return {
         "total_users": total_users,
@@ -1403,6 +2970,178 @@ async def get_admin_stats(current_user: User = Depends(get_current_user)):
         "total_messages": total_messages
     }
 
+@api_router.get("/admin/metrics")
+async def get_metrics(current_user: User = Depends(get_current_user)):
+    """Request, MongoDB and realtime metrics in Prometheus text format (Admin only)"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    return Response(render_prometheus_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@api_router.get("/admin/profile")
+async def profile_worker(seconds: float = 10, mode: str = "wall", interval: float = 0.005,
+                         current_user: User = Depends(get_current_user)):
+    """Sample this worker's event-loop thread for N seconds; collapsed stacks for flamegraph.pl/speedscope (Admin only)
+    Covers every task on the loop - use the X-Profile header to profile a single request."""
+    if not PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    if mode not in ("wall", "cpu"):
+        raise HTTPException(status_code=400, detail="mode must be wall or cpu")
+    if not 0 < seconds <= PROFILING_MAX_SECONDS or not 0.001 <= interval <= 1:
+        raise HTTPException(status_code=400, detail=f"seconds must be in (0, {PROFILING_MAX_SECONDS}], interval in [0.001, 1]")
+    if not profiling_lock.acquire(blocking=False):
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    
+    try:
+        sampler = StackSampler(threading.get_ident(), interval=interval, mode=mode).start()
+        await asyncio.sleep(seconds)
+        collapsed = sampler.stop()
+    finally:
+        profiling_lock.release()
+    
+    return Response(collapsed, media_type="text/plain; charset=utf-8", headers={"X-Profile-Samples": str(sampler.samples)})
+
+@api_router.get("/admin/profile/{profile_id}")
+async def get_request_profile(profile_id: str, current_user: User = Depends(get_current_user)):
+    """Collapsed stacks of a single request profiled via the X-Profile header (Admin only)"""
+    if not PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    if profile_id not in profile_results:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    
+    return Response(profile_results[profile_id], media_type="text/plain; charset=utf-8")
+
+@api_router.get("/admin/emergency/delivery-stats")
+async def get_emergency_delivery_stats(current_user: User = Depends(get_current_user)):
+    """Latency from alert creation to first ack and pending deliveries (Admin only)"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    return {
+        "first_ack_latency_seconds": emergency_ack_latency.snapshot(),
+        "pending_broadcasts": {
+            broadcast_id: {
+                "pending": len(delivery["pending"]),
+                "acknowledged": len(delivery["acked"])
+            }
+            for broadcast_id, delivery in emergency_deliveries.items()
+        }
+    }
+
+# Incremental sync for offline-first clients
+SYNC_COLLECTIONS = {  # {collection: field ordering the change feed}
+    "incidents": "updated_at",
+    "persons": "updated_at",
+    "messages": "updated_at",
+    "reports": "updated_at"
+}
+TOMBSTONE_RETENTION_DAYS = int(os.getenv("TOMBSTONE_RETENTION_DAYS", "30"))
+# Owner fields copied into tombstones, so sync_scope_query limits deletions to the users who saw the document
+TOMBSTONE_SCOPE_FIELDS = {
+    "messages": ("sender_id", "recipient_id"),
+    "reports": ("author_id",)
+}
+
+def build_tombstone(collection_name: str, document: dict, deleted_by: Optional[str] = None, reason: str = "deleted") -> dict:
+    tombstone = {
+        "collection": collection_name,
+        "id": document["id"],
+        "deleted_at": datetime.utcnow(),
+        "deleted_by": deleted_by,
+        "reason": reason
+    }
+    for field in TOMBSTONE_SCOPE_FIELDS.get(collection_name, ()):
+        tombstone[field] = document.get(field)
+    return tombstone
+
+async def record_tombstone(collection_name: str, document: dict, deleted_by: Optional[str] = None, reason: str = "deleted"):
+    """Remember a deletion so /sync can tell clients to drop the document"""
+    await db.tombstones.insert_one(build_tombstone(collection_name, document, deleted_by, reason))
+
+def sync_scope_query(collection_name: str, user: User, initial: bool) -> dict:
+    """Documents of a collection the user may see"""
+    if collection_name == "messages":
+        return {"$or": [{"recipient_id": None}, {"recipient_id": user.id}, {"sender_id": user.id}]}
+    if collection_name == "reports" and user.role != UserRole.ADMIN:
+        return {"author_id": user.id}
+    if collection_name == "persons" and initial:
+        return {"is_active": True}
+    return {}
+
+def after_cursor(field: str, since: datetime, since_id: str) -> dict:
+    return {"$or": [{field: {"$gt": since}}, {field: since, "id": {"$gt": since_id}}]}
+
+async def sync_collection(collection_name: str, cursor: SyncCursor, limit: int, user: User) -> dict:
+    """Changed documents and tombstones after cursor, merged in (timestamp, id) order"""
+    field = SYNC_COLLECTIONS[collection_name]
+    horizon = datetime.utcnow() - timedelta(days=TOMBSTONE_RETENTION_DAYS)
+    # Tombstones older than the horizon are gone - the client has to start over
+    full_resync = cursor.updated_at is not None and cursor.updated_at < horizon
+    since = None if full_resync else cursor.updated_at
+    since_id = cursor.id or ""
+    
+    query = sync_scope_query(collection_name, user, initial=since is None)
+    if since is not None:
+        query = {"$and": [query, after_cursor(field, since, since_id)]}
+    changed = await db[collection_name].find(query, {"_id": 0}).sort(
+        [(field, 1), ("id", 1)]
+    ).limit(limit + 1).to_list(limit + 1)
+    
+    tombstones = []
+    if since is not None:
+        tombstones = await db.tombstones.find(
+            {"$and": [
+                {"collection": collection_name},
+                sync_scope_query(collection_name, user, initial=False),
+                after_cursor("deleted_at", since, since_id)
+            ]},
+            {"_id": 0, "id": 1, "deleted_at": 1}
+        ).sort([("deleted_at", 1), ("id", 1)]).limit(limit + 1).to_list(limit + 1)
+    
+    entries = [((d.get(field) or datetime.min, d.get("id") or ""), d, False) for d in changed]
+    entries += [((t["deleted_at"], t["id"]), t, True) for t in tombstones]
+    entries.sort(key=lambda entry: entry[0])
+    page = entries[:limit]
+    
+    documents = []
+    deleted = []
+    for _key, document, is_tombstone in page:
+        if is_tombstone or (collection_name == "persons" and document.get("is_active") is False):
+            deleted.append(document["id"])
+        else:
+            documents.append(document)
+    
+    high_water = {"updated_at": since, "id": cursor.id if since is not None else None}
+    if page:
+        high_water = {"updated_at": page[-1][0][0], "id": page[-1][0][1]}
+    
+    return {
+        "changed": documents,
+        "deleted": list(dict.fromkeys(deleted)),
+        "high_water": high_water,
+        "has_more": len(entries) > limit,
+        "full_resync": full_resync
+    }
+
+@api_router.post("/sync")
+async def sync_changes(sync_request: SyncRequest, current_user: User = Depends(get_current_user)):
+    """Created/updated documents and deletions since the client's per-collection high-water marks"""
+    unknown = set(sync_request.collections) - set(SYNC_COLLECTIONS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown collections: {', '.join(sorted(unknown))}")
+    
+    limit = max(1, min(sync_request.limit, 1000))
+    server_time = datetime.utcnow()
+    collections = {}
+    for collection_name, cursor in sync_request.collections.items():
+        collections[collection_name] = await sync_collection(collection_name, cursor, limit, current_user)
+    
+    return MongoJSONResponse({"collections": collections, "server_time": server_time})
+
 # Online Status Management
 @api_router.post("/users/online-status")
 async def set_online_status(current_user: User = Depends(get_current_user)):
@@ -1441,15 +3180,9 @@ async def user_heartbeat(current_user: User = Depends(get_current_user)):
             "socket_id": None
         }
     
-    # ✅ FIX: Update last_activity in database for accurate online status detection
-    try:
-        await db.users.update_one(
-            {"id": user_id},
-            {"$set": {"last_activity": now}}
-        )
-        print(f"💓 Heartbeat: {current_user.username} activity updated in database")
-    except Exception as e:
-        print(f"❌ Heartbeat database update error: {e}")
+    # last_activity is written by heartbeat_flush_loop in one bulk write per interval
+    record_heartbeat(user_id, now)
+    logger.info("Heartbeat", extra={"sample": "heartbeat", "user_id": user_id})
     
     return {"status": "heartbeat", "timestamp": now}
 
@@ -1517,6 +3250,7 @@ async def create_first_user(user_data: UserCreate):
     user_dict["status"] = "Im Dienst"
     
     await db.users.insert_one(user_dict)
+    bump_version("users")
     
     # Return user without password - use serialize_mongo_data for proper serialization
     user_dict.pop("hashed_password", None)
@@ -1536,6 +3270,7 @@ async def reset_database():
         for collection_name in await db.list_collection_names():
             collection = db[collection_name]
             result = await collection.delete_many({})
+            bump_version(collection_name)
             collections_cleared += 1
             total_documents_deleted += result.deleted_count
             collection_names.append(collection_name)
@@ -1549,22 +3284,107 @@ async def reset_database():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Reset failed: {str(e)}")
 
-# App Configuration Endpoints
+# App Configuration Endpoints - cached in memory, rebuilt by update_app_configuration
+APP_CONFIG_CACHE_TTL_SECONDS = float(os.getenv("APP_CONFIG_CACHE_TTL_SECONDS", "60"))
+APP_CONFIG_ID = "app_config"  # _id of the single configuration document
+app_config_cache = {}  # pre-rendered bodies and ETags, see build_app_config_cache
+app_config_lock = asyncio.Lock()  # serializes loading and updating, so a slow load cannot cache an outdated config
+
+def decode_app_icon(app_icon: str):
+    """(bytes, media type) of a base64 icon, with or without data: URI prefix"""
+    media_type = "image/png"
+    data = app_icon
+    if app_icon.startswith("data:") and "," in app_icon:
+        header, data = app_icon.split(",", 1)
+        media_type = header[5:].split(";")[0] or media_type
+    return base64.b64decode(data), media_type
+
+def build_app_config_cache(config: dict) -> dict:
+    """Render the configuration once - with and without the inline icon - plus the icon itself"""
+    config = {k: v for k, v in config.items() if k != "_id"}
+    app_icon = config.get("app_icon")
+    cache = {"loaded_at": time.monotonic(), "icon": None}
+    
+    if app_icon:
+        try:
+            icon_bytes, media_type = decode_app_icon(app_icon)
+            icon_etag = hashlib.md5(icon_bytes).hexdigest()
+            cache["icon"] = icon_bytes
+            cache["icon_media_type"] = media_type
+            cache["icon_etag"] = f'"{icon_etag}"'
+            config["app_icon_url"] = f"/api/app/icon?v={icon_etag}"
+        except (ValueError, TypeError) as e:
+            logger.error(f"Invalid app icon in configuration: {str(e)}")
+            config["app_icon_url"] = None
+    else:
+        config["app_icon_url"] = None
+    
+    for variant, content in (("full", config), ("no_icon", {**config, "app_icon": None})):
+        body = orjson.dumps(AppConfiguration(**content).model_dump() | {"app_icon_url": config["app_icon_url"]})
+        cache[variant] = body
+        cache[f"{variant}_etag"] = f'"{hashlib.md5(body).hexdigest()}"'
+    return cache
+
+async def get_cached_app_config() -> dict:
+    """Cached configuration; loads (and creates the default once) on miss or after the TTL"""
+    cache = app_config_cache.get("current")
+    if cache and time.monotonic() - cache["loaded_at"] < APP_CONFIG_CACHE_TTL_SECONDS:
+        return cache
+    
+    async with app_config_lock:
+        cache = app_config_cache.get("current")
+        if cache and time.monotonic() - cache["loaded_at"] < APP_CONFIG_CACHE_TTL_SECONDS:
+            return cache
+        config = await load_app_config()
+        cache = build_app_config_cache(config)
+        app_config_cache["current"] = cache
+        return cache
+
+async def load_app_config() -> dict:
+    """Configuration document under APP_CONFIG_ID, created with an upsert instead of find+insert.
+    A configuration stored before the fixed _id is carried over, otherwise the defaults."""
+    config = await db.app_config.find_one({"_id": APP_CONFIG_ID}, {"_id": 0})
+    if config:
+        return config
+    legacy_config = await db.app_config.find_one({"_id": {"$ne": APP_CONFIG_ID}}, {"_id": 0})
+    initial_config = legacy_config or AppConfiguration().dict()
+    await db.app_config.update_one({"_id": APP_CONFIG_ID}, {"$setOnInsert": initial_config}, upsert=True)
+    if legacy_config:
+        await db.app_config.delete_many({"_id": {"$ne": APP_CONFIG_ID}})
+    return await db.app_config.find_one({"_id": APP_CONFIG_ID}, {"_id": 0})
+
 @api_router.get("/app/config", response_model=AppConfiguration)
-async def get_app_configuration():
-    """Get current app configuration"""
-    config = await db.app_config.find_one()
-    if not config:
-        # Create default configuration
-        default_config = AppConfiguration()
-        await db.app_config.insert_one(default_config.dict())
-        return default_config
-    
-    # Convert MongoDB _id to our id field
-    if "_id" in config:
-        del config["_id"]
+async def get_app_configuration(request: Request, include_icon: bool = True):
+    """Get current app configuration (include_icon=false omits the inline icon, use app_icon_url)"""
+    cache = await get_cached_app_config()
+    variant = "full" if include_icon else "no_icon"
+    etag = cache[f"{variant}_etag"]
+    # no-cache: clients revalidate every time (cheap 304) so admin changes show up immediately
+    headers = {"ETag": etag, "Cache-Control": "public, no-cache"}
+    
+    cached = not_modified(request, etag, headers)
+    if cached:
+        return cached
+    return Response(content=cache[variant], media_type="application/json", headers=headers)
+
+@api_router.get("/app/icon")
+async def get_app_icon(request: Request, v: Optional[str] = None):
+    """App icon as image - immutable when requested with the versioned URL from app_icon_url"""
+    cache = await get_cached_app_config()
+    if not cache["icon"]:
+        raise HTTPException(status_code=404, detail="No app icon configured")
+    
+    etag = cache["icon_etag"]
+    if v and f'"{v}"' == etag:
+        cache_control = "public, max-age=31536000, immutable"
+    else:
+        cache_control = "public, no-cache"
+    headers = {"ETag": etag, "Cache-Control": cache_control}
     
-    return AppConfiguration(**config)
+    cached = not_modified(request, etag, headers)
+    if cached:
+        return cached
+    return Response(content=cache["icon"], media_type=cache["icon_media_type"], headers=headers)
 
 @api_router.put("/admin/app/config", response_model=AppConfiguration)
 async def update_app_configuration(
@@ -1576,27 +3396,15 @@ async def update_app_configuration(
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Only admins can update app configuration")
     
-    # Get current config
-    current_config = await db.app_config.find_one()
-    if not current_config:
-        # Create default if none exists
-        current_config = AppConfiguration().dict()
-        await db.app_config.insert_one(current_config)
-    
     # Update only provided fields
     update_data = {k: v for k, v in config_update.dict().items() if v is not None}
     update_data["updated_at"] = datetime.utcnow()
     
-    # Update in database
-    await db.app_config.update_one(
-        {"id": current_config["id"]},
-        {"$set": update_data}
-    )
-    
-    # Get updated config
-    updated_config = await db.app_config.find_one({"id": current_config["id"]})
-    if "_id" in updated_config:
-        del updated_config["_id"]
+    async with app_config_lock:
+        await load_app_config()  # creates the document on first use
+        await db.app_config.update_one({"_id": APP_CONFIG_ID}, {"$set": update_data})
+        updated_config = await db.app_config.find_one({"_id": APP_CONFIG_ID}, {"_id": 0})
+        app_config_cache["current"] = build_app_config_cache(updated_config)
     
     return AppConfiguration(**updated_config)
 
@@ -1622,6 +3430,7 @@ async def assign_user_district_team(
     update_data['updated_at'] = datetime.utcnow()
     
     result = await db.users.update_one({"id": user_id}, {"$set": update_data})
+    bump_version("users")
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="User not found")
@@ -1666,26 +3475,77 @@ async def get_teams(current_user: User = Depends(get_current_user)):
 async def root():
     return {"message": "Stadtwache API", "version": "1.0.0"}
 
-# Statische Dateien für Frontend
-static_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../frontend/dist"))
-expo_static_path = os.path.join(static_path, "_expo")
-assets_path = os.path.join(static_path, "assets")
-fonts_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../frontend/node_modules/@expo/vector-icons/build/vendor/react-native-vector-icons/Fonts"))
-
-if os.path.exists(expo_static_path):
+# Statische Dateien für Frontend - precompressed variants, immutable caching for hashed bundles
+FRONTEND_BUILD_DIR = Path(__file__).parent.parent / "frontend" / "dist"
+FONTS_DIR = Path(__file__).parent.parent / "frontend" / "node_modules" / "@expo" / "vector-icons" / "build" / "vendor" / "react-native-vector-icons" / "Fonts"
+STATIC_LARGE_FILE_SIZE = int(os.getenv("STATIC_LARGE_FILE_SIZE", str(1024 * 1024)))
+HASHED_ASSET_PATTERN = re.compile(r"[.-][0-9a-fA-F]{8,}\.[A-Za-z0-9]+$")
+PRECOMPRESSED_VARIANTS = (("br", ".br"), ("gzip", ".gz"))  # preference order, see precompress_static.py
+
+def static_cache_control(path: str) -> str:
+    """Content-hashed bundles never change under the same name; everything else revalidates"""
+    if HASHED_ASSET_PATTERN.search(path):
+        return "public, max-age=31536000, immutable"
+    return "public, no-cache"
+
+class StaticAssetResponse(FileResponse):
+    """FileResponse with bigger read chunks for large files.
+
+    Starlette already hands the file to the server via http.response.pathsend
+    (sendfile) when the ASGI server advertises that extension.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.stat_result is not None and self.stat_result.st_size >= STATIC_LARGE_FILE_SIZE:
+            self.chunk_size = 1024 * 1024
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles serving .br/.gz siblings generated at build time, with cache headers"""
+    async def get_response(self, path: str, scope) -> Response:
+        accepted = {
+            part.split(";")[0].strip().lower()
+            for part in Headers(scope=scope).get("accept-encoding", "").split(",")
+        }
+        response = None
+        for encoding, suffix in PRECOMPRESSED_VARIANTS:
+            if encoding not in accepted or scope["method"] not in ("GET", "HEAD"):
+                continue
+            full_path, stat_result = await run_in_threadpool(self.lookup_path, path + suffix)
+            if stat_result and stat.S_ISREG(stat_result.st_mode):
+                response = self.file_response(full_path, stat_result, scope)
+                response.headers["Content-Encoding"] = encoding
+                media_type = mimetypes.guess_type(path)[0]
+                if media_type:
+                    response.headers["Content-Type"] = media_type
+                break
+        
+        if response is None:
+            response = await super().get_response(path, scope)
+        
+        response.headers["Cache-Control"] = static_cache_control(path)
+        response.headers.add_vary_header("Accept-Encoding")
+        return response
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> Response:
+        response = StaticAssetResponse(full_path, status_code=status_code, stat_result=stat_result)
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
+
+if FONTS_DIR.exists():
+    # Mount fonts for icons (before /assets, which would otherwise shadow this path)
+    app.mount("/assets/node_modules/@expo/vector-icons/build/vendor/react-native-vector-icons/Fonts", PrecompressedStaticFiles(directory=str(FONTS_DIR)), name="fonts")
+    logger.info(f"✅ Icon fonts mounted from: {FONTS_DIR}")
+
+if (FRONTEND_BUILD_DIR / "_expo").exists():
     # Mount _expo directory to /_expo path
-    app.mount("/_expo", StaticFiles(directory=expo_static_path), name="expo_static")
-    print(f"✅ Expo static files mounted from: {expo_static_path}")
+    app.mount("/_expo", PrecompressedStaticFiles(directory=str(FRONTEND_BUILD_DIR / "_expo")), name="expo_static")
+    logger.info(f"✅ Expo static files mounted from: {FRONTEND_BUILD_DIR / '_expo'}")
 
-if os.path.exists(assets_path):
-    # Mount assets directory to /assets path  
-    app.mount("/assets", StaticFiles(directory=assets_path), name="assets")
-    print(f"✅ Assets mounted from: {assets_path}")
-
-if os.path.exists(fonts_path):
-    # Mount fonts for icons
-    app.mount("/assets/node_modules/@expo/vector-icons/build/vendor/react-native-vector-icons/Fonts", StaticFiles(directory=fonts_path), name="fonts")
-    print(f"✅ Icon fonts mounted from: {fonts_path}")
+if (FRONTEND_BUILD_DIR / "assets").exists():
+    # Mount assets directory to /assets path
+    app.mount("/assets", PrecompressedStaticFiles(directory=str(FRONTEND_BUILD_DIR / "assets")), name="assets")
+    logger.info(f"✅ Assets mounted from: {FRONTEND_BUILD_DIR / 'assets'}")
 
 # Root route wird weiter unten definiert
 
@@ -1698,17 +3558,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
+# Compress JSON and text responses
+app.add_middleware(CompressionMiddleware)
+
+# Outermost, so latency and sizes include compression
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# Single-request profiles (X-Profile header) - not installed at all unless enabled
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
 
 # Schichtverwaltung API Endpoints - Einfache Funktionen
 @app.post("/api/checkin")
-async def check_in(current_user: User = Depends(get_current_user)):
+async def check_in(request: Request, current_user: User = Depends(get_current_user)):
     """Benutzer Check-In"""
+    idempotency_key, replay = await idempotent_replay(request, current_user.id, "check_in")
+    if replay is not None:
+        return replay
+    
     try:
         checkin_data = {
             "id": str(uuid.uuid4()),
@@ -1718,34 +3586,38 @@ async def check_in(current_user: User = Depends(get_current_user)):
             "status": "ok"
         }
         
-        await db.checkins.insert_one(checkin_data)
+        await repositories.checkins.insert(checkin_data)
         
         # Update user's last check-in time and reset missed check-ins
-        await db.users.update_one(
+        await repositories.users.update(
             {"id": current_user.id},
             {"$set": {"last_check_in": datetime.utcnow(), "missed_check_ins": 0}}
         )
-        
-        return serialize_mongo_data(checkin_data)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    
+    return await remember_response(idempotency_key, serialize_mongo_data(checkin_data))
 
 @app.get("/api/checkins")
 async def get_checkins(current_user: User = Depends(get_current_user)):
     """Lade Check-Ins"""
     try:
         if current_user.role == "admin":
-            checkins = await db.checkins.find().sort("timestamp", -1).to_list(100)
+            checkins = await db.checkins.find({}, {"_id": 0}).sort("timestamp", -1).to_list(100)
         else:
-            checkins = await db.checkins.find({"user_id": current_user.id}).sort("timestamp", -1).to_list(50)
+            checkins = await db.checkins.find({"user_id": current_user.id}, {"_id": 0}).sort("timestamp", -1).to_list(50)
         
-        return serialize_mongo_data(checkins)
+        return MongoJSONResponse(checkins)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_router.post("/vacations")
-async def request_vacation(vacation_data: VacationCreate, current_user: User = Depends(get_current_user)):
+async def request_vacation(vacation_data: VacationCreate, request: Request, current_user: User = Depends(get_current_user)):
     """Urlaubsantrag stellen"""
+    idempotency_key, replay = await idempotent_replay(request, current_user.id, "request_vacation")
+    if replay is not None:
+        return replay
+    
     try:
         vacation_dict = {
             "id": str(uuid.uuid4()),
@@ -1758,31 +3630,33 @@ async def request_vacation(vacation_data: VacationCreate, current_user: User = D
             "created_at": datetime.utcnow()
         }
         
-        # Log vacation request
-        print(f"📅 URLAUBSANTRAG: {current_user.username} ({current_user.id}) beantragt Urlaub vom {vacation_data.start_date} bis {vacation_data.end_date}")
-        print(f"   Grund: {vacation_data.reason}")
-        print(f"   Status: pending")
-        print(f"   ID: {vacation_dict['id']}")
+        await repositories.leave.create_vacation(vacation_dict)
         
-        await db.vacations.insert_one(vacation_dict)
-        
-        print(f"✅ Urlaubsantrag erfolgreich in Datenbank gespeichert")
-        
-        return serialize_mongo_data(vacation_dict)
+        # Log vacation request
+        logger.info("Urlaubsantrag gestellt", extra={
+            "vacation_id": vacation_dict["id"],
+            "user_id": current_user.id,
+            "user_name": current_user.username,
+            "start_date": vacation_data.start_date,
+            "end_date": vacation_data.end_date,
+            "reason": vacation_data.reason
+        })
     except Exception as e:
-        print(f"❌ FEHLER beim Urlaubsantrag von {current_user.username}: {str(e)}")
+        logger.error(f"Fehler beim Urlaubsantrag: {str(e)}", extra={"user_id": current_user.id})
         raise HTTPException(status_code=500, detail=str(e))
+    
+    return await remember_response(idempotency_key, serialize_mongo_data(vacation_dict))
 
 @api_router.get("/vacations")
 async def get_vacations(current_user: User = Depends(get_current_user)):
     """Lade Urlaubsanträge"""
     try:
         if current_user.role == "admin":
-            vacations = await db.vacations.find().sort("created_at", -1).to_list(100)
+            vacations = await db.vacations.find({}, {"_id": 0}).sort("created_at", -1).to_list(100)
         else:
-            vacations = await db.vacations.find({"user_id": current_user.id}).sort("created_at", -1).to_list(100)
+            vacations = await db.vacations.find({"user_id": current_user.id}, {"_id": 0}).sort("created_at", -1).to_list(100)
         
-        return serialize_mongo_data(vacations)
+        return MongoJSONResponse(vacations)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1840,27 +3714,25 @@ async def approve_vacation(vacation_id: str, approval_data: VacationApproval, cu
         else:
             update_data["rejection_reason"] = approval_data.reason
         
-        # Log vacation approval/rejection
-        action_text = "GENEHMIGT" if approval_data.action == "approve" else "ABGELEHNT"
-        print(f"📅 URLAUBSENTSCHEIDUNG: Admin {current_user.username} hat Urlaubsantrag {action_text}")
-        print(f"   Antrag ID: {vacation_id}")
-        print(f"   Benutzer: {vacation.get('user_name', 'unbekannt')}")
-        print(f"   Zeitraum: {vacation.get('start_date')} bis {vacation.get('end_date')}")
-        print(f"   Begründung: {approval_data.reason}")
-        
         result = await db.vacations.update_one(
             {"id": vacation_id},
             {"$set": update_data}
         )
         
-        if result.matched_count > 0:
-            print(f"✅ Urlaubsentscheidung erfolgreich in Datenbank gespeichert")
-        else:
-            print(f"❌ Fehler: Urlaubsantrag {vacation_id} nicht gefunden")
-        
         if result.matched_count == 0:
             raise HTTPException(status_code=404, detail="Vacation request not found")
         
+        # Log vacation approval/rejection
+        logger.info("Urlaubsantrag entschieden", extra={
+            "vacation_id": vacation_id,
+            "decision": update_data["status"],
+            "admin": current_user.username,
+            "user_name": vacation.get("user_name", "unbekannt"),
+            "start_date": vacation.get("start_date"),
+            "end_date": vacation.get("end_date"),
+            "reason": approval_data.reason
+        })
+        
         # Aktualisierte Vacation zurückgeben
         updated_vacation = await db.vacations.find_one({"id": vacation_id})
         return serialize_mongo_data(updated_vacation)
@@ -1875,19 +3747,19 @@ async def get_all_vacations(current_user: User = Depends(get_current_user)):
         raise HTTPException(status_code=403, detail="Not authorized")
     
     try:
-        vacations = await db.vacations.find().sort("created_at", -1).to_list(100)
-        # Clean up MongoDB ObjectId fields for JSON serialization
-        for vacation in vacations:
-            if "_id" in vacation:
-                del vacation["_id"]
-        return serialize_mongo_data(vacations)
+        vacations = await db.vacations.find({}, {"_id": 0}).sort("created_at", -1).to_list(100)
+        return MongoJSONResponse(vacations)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # ✅ NEU: Sick Leave (Krankmeldung) Management APIs
 @api_router.post("/sick-leave")
-async def create_sick_leave(sick_leave_data: dict, current_user: User = Depends(get_current_user)):
+async def create_sick_leave(sick_leave_data: dict, request: Request, current_user: User = Depends(get_current_user)):
     """Create new sick leave request"""
+    idempotency_key, replay = await idempotent_replay(request, current_user.id, "create_sick_leave")
+    if replay is not None:
+        return replay
+    
     try:
         sick_leave = {
             "id": str(uuid.uuid4()),
@@ -1902,24 +3774,24 @@ async def create_sick_leave(sick_leave_data: dict, current_user: User = Depends(
             "updated_at": datetime.utcnow()
         }
         
-        result = await db.sick_leave.insert_one(sick_leave)
-        if result.inserted_id:
-            print(f"✅ Krankmeldung erstellt: {sick_leave['user_name']} ({sick_leave['start_date']} - {sick_leave['end_date']})")
-            return {"message": "Krankmeldung erfolgreich eingereicht", "sick_leave": serialize_mongo_data(sick_leave)}
-        else:
+        result = await repositories.leave.create_sick_leave(sick_leave)
+        if not result.inserted_id:
             raise HTTPException(status_code=500, detail="Krankmeldung konnte nicht erstellt werden")
+        logger.info(f"✅ Krankmeldung erstellt: {sick_leave['user_name']} ({sick_leave['start_date']} - {sick_leave['end_date']})")
     except Exception as e:
-        print(f"❌ Fehler beim Erstellen der Krankmeldung: {e}")
+        logger.error(f"❌ Fehler beim Erstellen der Krankmeldung: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    
+    return await remember_response(idempotency_key, {"message": "Krankmeldung erfolgreich eingereicht", "sick_leave": serialize_mongo_data(sick_leave)})
 
 @api_router.get("/sick-leave")
 async def get_user_sick_leave(current_user: User = Depends(get_current_user)):
     """Get current user's sick leave requests"""
     try:
-        sick_leave_list = await db.sick_leave.find({"user_id": current_user.id}).to_list(None)
-        return serialize_mongo_data(sick_leave_list)
+        sick_leave_list = await db.sick_leave.find({"user_id": current_user.id}, {"_id": 0}).to_list(None)
+        return MongoJSONResponse(sick_leave_list)
     except Exception as e:
-        print(f"❌ Fehler beim Laden der Krankmeldungen: {e}")
+        logger.error(f"❌ Fehler beim Laden der Krankmeldungen: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_router.get("/admin/sick-leave")
@@ -1929,10 +3801,10 @@ async def get_all_sick_leave(current_user: User = Depends(get_current_user)):
         raise HTTPException(status_code=403, detail="Nur Administratoren können alle Krankmeldungen einsehen")
     
     try:
-        sick_leave_list = await db.sick_leave.find({}).to_list(None)
-        return serialize_mongo_data(sick_leave_list)
+        sick_leave_list = await db.sick_leave.find({}, {"_id": 0}).to_list(None)
+        return MongoJSONResponse(sick_leave_list)
     except Exception as e:
-        print(f"❌ Fehler beim Laden aller Krankmeldungen: {e}")
+        logger.error(f"❌ Fehler beim Laden aller Krankmeldungen: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_router.put("/admin/sick-leave/{sick_leave_id}/approve")
@@ -1969,14 +3841,14 @@ async def approve_sick_leave(sick_leave_id: str, action_data: dict, current_user
         
         # Get updated sick leave
         updated_sick_leave = await db.sick_leave.find_one({"id": sick_leave_id})
-        print(f"✅ Krankmeldung {status}: {updated_sick_leave.get('user_name')} von {current_user.username}")
+        logger.info(f"✅ Krankmeldung {status}: {updated_sick_leave.get('user_name')} von {current_user.username}")
         
         return serialize_mongo_data(updated_sick_leave)
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Fehler beim Genehmigen der Krankmeldung: {e}")
+        logger.error(f"❌ Fehler beim Genehmigen der Krankmeldung: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_router.delete("/sick-leave/{sick_leave_id}")
@@ -2000,7 +3872,7 @@ async def delete_sick_leave(sick_leave_id: str, current_user: User = Depends(get
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Fehler beim Löschen der Krankmeldung: {e}")
+        logger.error(f"❌ Fehler beim Löschen der Krankmeldung: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/admin/districts")
@@ -2052,6 +3924,7 @@ async def assign_user_to_team_district(assignment: TeamAssignment, current_user:
         {"id": assignment.user_id},
         {"$set": update_data}
     )
+    bump_version("users")
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="User not found")
@@ -2066,21 +3939,22 @@ async def get_attendance_list(current_user: User = Depends(get_current_user)):
     
     try:
         # Alle Benutzer mit Status und Team-Info laden
-        users = await db.users.find().to_list(100)
+        reader = read_db("attendance_list")
+        users = await reader.users.find().to_list(100)
         attendance_list = []
         
         for user in users:
             # Team-Name abrufen falls zugewiesen
             team_name = "Nicht zugewiesen"
             if user.get("patrol_team"):
-                team = await db.teams.find_one({"id": user["patrol_team"]})
+                team = await reader.teams.find_one({"id": user["patrol_team"]})
                 if team:
                     team_name = team["name"]
             
             # Bezirks-Name abrufen falls zugewiesen  
             district_name = "Nicht zugewiesen"
             if user.get("assigned_district"):
-                district = await db.districts.find_one({"id": user["assigned_district"]})
+                district = await reader.districts.find_one({"id": user["assigned_district"]})
                 if district:
                     district_name = district["name"]
             
@@ -2108,7 +3982,8 @@ async def get_team_status(current_user: User = Depends(get_current_user)):
         raise HTTPException(status_code=403, detail="Not authorized")
     
     try:
-        teams = await db.teams.find().to_list(100)
+        reader = read_db("team_status")
+        teams = await reader.teams.find().to_list(100)
         team_status_list = []
         
         for team in teams:
@@ -2116,7 +3991,7 @@ async def get_team_status(current_user: User = Depends(get_current_user)):
             members = []
             if team.get("members"):
                 for member_id in team["members"]:
-                    user = await db.users.find_one({"id": member_id})
+                    user = await reader.users.find_one({"id": member_id})
                     if user:
                         members.append({
                             "id": user["id"],
@@ -2127,7 +4002,7 @@ async def get_team_status(current_user: User = Depends(get_current_user)):
             # Bezirks-Name abrufen
             district_name = "Nicht zugewiesen"
             if team.get("district_id"):
-                district = await db.districts.find_one({"id": team["district_id"]})
+                district = await reader.districts.find_one({"id": team["district_id"]})
                 if district:
                     district_name = district["name"]
             
@@ -2169,52 +4044,679 @@ async def update_team_status(team_id: str, status_data: dict, current_user: User
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Idempotency - stored results of already executed writes, keyed per user.
+# A create request reserves its key ("pending") before writing and fills in the result afterwards.
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", str(24 * 3600)))
+IDEMPOTENCY_PENDING_SECONDS = int(os.getenv("IDEMPOTENCY_PENDING_SECONDS", "60"))  # older reservations count as abandoned
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "2048"))
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+# Recently stored results, most recent last: {idempotency id: (stored at, result, request fingerprint)}
+idempotency_cache: "OrderedDict[str, tuple]" = OrderedDict()
+pending_idempotency_fingerprints = {}  # {idempotency id: fingerprint} reserved by this worker, result not stored yet
+
+def idempotency_id(user_id: str, scope: str, key: str) -> str:
+    return f"{user_id}:{scope}:{key}"
+
+def cache_idempotent_result(key: str, result, stored_at: datetime, fingerprint: Optional[str] = None):
+    idempotency_cache[key] = (stored_at, result, fingerprint)
+    idempotency_cache.move_to_end(key)
+    while len(idempotency_cache) > IDEMPOTENCY_CACHE_SIZE:
+        idempotency_cache.popitem(last=False)
+
+def cached_idempotent_result(key: str):
+    entry = idempotency_cache.get(key)
+    if entry is None:
+        return None
+    if datetime.utcnow() - entry[0] > timedelta(seconds=IDEMPOTENCY_TTL_SECONDS):
+        del idempotency_cache[key]
+        return None
+    return entry
+
+async def load_idempotent_results(ids: List[str]) -> Dict[str, Any]:
+    """{idempotency id: stored result} for the ids that were already executed"""
+    results = {}
+    missing = []
+    for key in ids:
+        entry = cached_idempotent_result(key)
+        if entry is None:
+            missing.append(key)
+        else:
+            results[key] = entry[1]
+    if missing:
+        stored = await db.idempotency_keys.find({"_id": {"$in": missing}, "state": {"$ne": "pending"}}).to_list(None)
+        for entry in stored:
+            cache_idempotent_result(entry["_id"], entry["result"], entry["created_at"], entry.get("fingerprint"))
+            results[entry["_id"]] = entry["result"]
+    return results
+
+async def store_idempotent_results(results: Dict[str, Any]):
+    """Record results, completing reservations made by reserve_idempotency_key"""
+    if not results:
+        return
+    now = datetime.utcnow()
+    for key, result in results.items():
+        cache_idempotent_result(key, result, now, pending_idempotency_fingerprints.pop(key, None))
+    await db.idempotency_keys.bulk_write(
+        [UpdateOne({"_id": key}, {"$set": {"state": "done", "result": result}, "$setOnInsert": {"created_at": now}}, upsert=True)
+         for key, result in results.items()],
+        ordered=False
+    )
+
+def idempotent_result_response(entry: dict, fingerprint: str) -> Response:
+    """Replay of a stored result; 422 when the key came with another body, 409 while the first request still runs"""
+    if entry.get("fingerprint") and entry["fingerprint"] != fingerprint:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request body")
+    if entry.get("state") == "pending":
+        raise HTTPException(
+            status_code=409,
+            detail="A request with this Idempotency-Key is still being processed",
+            headers={"Retry-After": "1"}
+        )
+    return MongoJSONResponse(entry["result"], headers={"Idempotent-Replayed": "true"})
+
+async def reserve_idempotency_key(key: str, fingerprint: str) -> Optional[dict]:
+    """Reserve key for this request - None when reserved, otherwise the existing entry"""
+    now = datetime.utcnow()
+    try:
+        await db.idempotency_keys.insert_one({"_id": key, "state": "pending", "fingerprint": fingerprint, "created_at": now})
+        return None
+    except DuplicateKeyError:
+        pass
+    entry = await db.idempotency_keys.find_one({"_id": key})
+    if entry is None:  # expired in between
+        return await reserve_idempotency_key(key, fingerprint)
+    abandoned = now - timedelta(seconds=IDEMPOTENCY_PENDING_SECONDS)
+    if entry.get("state") == "pending" and entry.get("fingerprint") == fingerprint and entry["created_at"] < abandoned:
+        # The first attempt died without a result - take over its reservation
+        result = await db.idempotency_keys.update_one(
+            {"_id": key, "state": "pending", "created_at": entry["created_at"]},
+            {"$set": {"created_at": now}}
+        )
+        if result.modified_count:
+            return None
+    return entry
+
+async def idempotent_replay(request: Request, user_id: str, scope: str):
+    """(idempotency id, replay response) for a create request - both None without an Idempotency-Key header.
+    Without a replay the key is reserved; finish with remember_response after the write."""
+    key = request.headers.get("idempotency-key")
+    if not key:
+        return None, None
+    if len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise HTTPException(status_code=400, detail="Idempotency-Key is too long")
+    key = idempotency_id(user_id, scope, key)
+    fingerprint = hashlib.sha256(await request.body()).hexdigest()
+    
+    cached = cached_idempotent_result(key)
+    if cached is not None:
+        return key, idempotent_result_response({"result": cached[1], "fingerprint": cached[2]}, fingerprint)
+    entry = await reserve_idempotency_key(key, fingerprint)
+    if entry is None:
+        pending_idempotency_fingerprints[key] = fingerprint
+        while len(pending_idempotency_fingerprints) > IDEMPOTENCY_CACHE_SIZE:  # requests that failed before storing
+            pending_idempotency_fingerprints.pop(next(iter(pending_idempotency_fingerprints)))
+        return key, None
+    if entry.get("state") != "pending":
+        cache_idempotent_result(key, entry["result"], entry["created_at"], entry.get("fingerprint"))
+    return key, idempotent_result_response(entry, fingerprint)
+
+async def remember_response(key: Optional[str], result):
+    """Store the response of a create request under its idempotency id and return it unchanged.
+    The write already happened, so a failure to store is logged instead of failing the request."""
+    if key:
+        try:
+            await store_idempotent_results({key: result.dict() if isinstance(result, BaseModel) else result})
+        except Exception as e:
+            logger.error(f"Storing idempotent result failed: {e}", extra={"idempotency_id": key})
+    return result
+
+# Batch writes for devices replaying an offline queue
+BATCH_MAX_OPERATIONS = int(os.getenv("BATCH_MAX_OPERATIONS", "500"))
+
+def client_timestamp(value, now: datetime) -> datetime:
+    """Timestamp recorded offline by the device; never in the future"""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None)
+        except ValueError:
+            value = None
+    if not isinstance(value, datetime) or value > now:
+        return now
+    return value
+
+def validate_batch_items(items, build) -> Tuple[List[Tuple[int, Any]], Dict[int, str]]:
+    """([(index, built value)], {index: error}) - build raises ValueError for an invalid item"""
+    valid, errors = [], {}
+    for index, data in items:
+        try:
+            valid.append((index, build(data)))
+        except (ValueError, TypeError) as e:  # pydantic's ValidationError is a ValueError
+            errors[index] = str(e)
+    return valid, errors
+
+def failed_write_indices(valid, error: BulkWriteError) -> Dict[int, str]:
+    """{batch index: error} of the writes a BulkWriteError reports as failed"""
+    return {
+        valid[write_error["index"]][0]: write_error.get("errmsg", "Write failed")
+        for write_error in error.details.get("writeErrors", [])
+    }
+
+async def bulk_insert(collection, valid) -> Dict[int, str]:
+    """Unordered insert_many of [(index, document)], returning {batch index: error} of the documents not written"""
+    if not valid:
+        return {}
+    try:
+        await collection.insert_many([dict(document) for _index, document in valid], ordered=False)
+    except BulkWriteError as e:
+        return failed_write_indices(valid, e)
+    return {}
+
+async def batch_checkins(items, user: User, now: datetime) -> Tuple[Dict[int, Any], Dict[int, str]]:
+    def build(data):
+        return {
+            "id": str(uuid.uuid4()),
+            "user_id": user.id,
+            "user_name": user.username,
+            "timestamp": client_timestamp(data.get("timestamp"), now),
+            "location": data.get("location"),
+            "status": data.get("status", "ok"),
+            "message": data.get("message")
+        }
+    valid, errors = validate_batch_items(items, build)
+    errors.update(await bulk_insert(db.checkins, valid))
+    written = [(index, document) for index, document in valid if index not in errors]
+    
+    if written:
+        # Update user's last check-in time once for the whole run
+        await db.users.update_one(
+            {"id": user.id},
+            {"$max": {"last_check_in": max(d["timestamp"] for _index, d in written)}, "$set": {"missed_check_ins": 0}}
+        )
+    return dict(written), errors
+
+async def batch_locations(items, user: User, now: datetime) -> Tuple[Dict[int, Any], Dict[int, str]]:
+    def build(data):
+        if not isinstance(data.get("location"), dict):
+            raise ValueError("location is required")
+        return LocationUpdate(
+            user_id=user.id,
+            location=data["location"],
+            timestamp=client_timestamp(data.get("timestamp"), now)
+        ).dict()
+    valid, errors = validate_batch_items(items, build)
+    errors.update(await bulk_insert(db.locations, valid))
+    written = [(index, document) for index, document in valid if index not in errors]
+    
+    if written:
+        # Only the newest point is interesting for live maps
+        await sio.emit('location_updated', max((d for _index, d in written), key=lambda d: d["timestamp"]))
+    return {index: {"status": "success"} for index, _document in written}, errors
+
+async def batch_messages(items, user: User, now: datetime) -> Tuple[Dict[int, Any], Dict[int, str]]:
+    def build(data):
+        # timestamp is server time so /sync high-water marks still see the message; the device's time is kept apart
+        return Message(
+            **MessageCreate(**data).dict(),
+            sender_id=user.id,
+            sender_name=user.username,
+            timestamp=now,
+            updated_at=now
+        ).dict() | {"created_at": now, "client_timestamp": client_timestamp(data.get("timestamp"), now)}
+    valid, errors = validate_batch_items(items, build)
+    errors.update(await bulk_insert(db.messages, valid))
+    written = [(index, message) for index, message in valid if index not in errors]
+    
+    for _index, message in written:
+        if message.get("recipient_id"):
+            await register_private_message(message)
+        await sio.emit('new_message', message, room=message["channel"])
+    return dict(written), errors
+
+async def batch_incident_updates(items, user: User, now: datetime) -> Tuple[Dict[int, Any], Dict[int, str]]:
+    def build(data):
+        incident_id = data.get("incident_id")
+        updates = {k: v for k, v in (data.get("updates") or {}).items() if k not in ("_id", "id")}
+        if not incident_id or not updates:
+            raise ValueError("incident_id and updates are required")
+        return UpdateOne({"id": incident_id}, {"$set": {**updates, "updated_at": now}})
+    valid, errors = validate_batch_items(items, build)
+    if valid:
+        try:
+            await db.incidents.bulk_write([operation for _index, operation in valid], ordered=False)
+        except BulkWriteError as e:
+            errors.update(failed_write_indices(valid, e))
+        bump_version("incidents")
+    
+    incident_ids = list({data["incident_id"] for index, data in items if index not in errors})
+    incidents = {
+        incident["id"]: incident
+        for incident in await db.incidents.find({"id": {"$in": incident_ids}}, INCIDENT_READ.projection).to_list(None)
+    }
+    for incident in incidents.values():
+        await sio.emit('incident_updated', INCIDENT_READ.prepare(incident))
+    
+    results = {}
+    for index, data in items:
+        if index in errors:
+            continue
+        incident = incidents.get(data["incident_id"])
+        if incident:
+            results[index] = INCIDENT_READ.prepare(dict(incident))
+        else:
+            errors[index] = "Incident not found"
+    return results, errors
+
+BATCH_HANDLERS = {
+    "checkin": batch_checkins,
+    "location": batch_locations,
+    "message": batch_messages,
+    "incident_update": batch_incident_updates,
+}
+
+@api_router.post("/batch")
+async def batch_write(batch: BatchRequest, current_user: User = Depends(get_current_user)):
+    """Execute an ordered list of queued device operations with one authentication and bulk writes"""
+    operations = batch.operations
+    if len(operations) > BATCH_MAX_OPERATIONS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_OPERATIONS} operations per batch")
+    
+    now = datetime.utcnow()
+    results: List[Optional[dict]] = [None] * len(operations)
+    
+    # Retried operations return their stored result
+    keys = {
+        index: idempotency_id(current_user.id, f"batch:{operation.op}", operation.idempotency_key)
+        for index, operation in enumerate(operations) if operation.idempotency_key
+    }
+    stored = await load_idempotent_results(list(set(keys.values())))
+    for index, key in keys.items():
+        if key in stored:
+            results[index] = {"index": index, "op": operations[index].op, "status": "duplicate", "result": stored[key]}
+    
+    # Consecutive operations of the same type form one bulk run, keeping the overall order
+    runs = []
+    queued_keys = set()
+    for index, operation in enumerate(operations):
+        if results[index] is not None:
+            continue
+        if operation.op not in BATCH_HANDLERS:
+            results[index] = {"index": index, "op": operation.op, "status": "error", "error": "Unknown operation"}
+            continue
+        if index in keys:
+            if keys[index] in queued_keys:
+                # Same key twice in one batch - execute once
+                results[index] = {"index": index, "op": operation.op, "status": "duplicate", "result": None}
+                continue
+            queued_keys.add(keys[index])
+        if runs and runs[-1][0] == operation.op:
+            runs[-1][1].append((index, operation.data))
+        else:
+            runs.append((operation.op, [(index, operation.data)]))
+    
+    # Invalid items and failed writes are reported per index; the rest of their run is still written
+    to_store = {}
+    for op, items in runs:
+        try:
+            run_results, run_errors = await BATCH_HANDLERS[op](items, current_user, now)
+        except Exception as e:
+            for index, _data in items:
+                results[index] = {"index": index, "op": op, "status": "error", "error": str(e)}
+            continue
+        for index, _data in items:
+            if index in run_errors:
+                results[index] = {"index": index, "op": op, "status": "error", "error": run_errors[index]}
+                continue
+            results[index] = {"index": index, "op": op, "status": "ok", "result": run_results[index]}
+            if index in keys:
+                to_store[keys[index]] = run_results[index]
+    
+    await store_idempotent_results(to_store)
+    
+    return MongoJSONResponse({
+        "results": results,
+        "succeeded": sum(1 for result in results if result["status"] == "ok"),
+        "failed": sum(1 for result in results if result["status"] == "error")
+    })
+
+# Retention and archival - old documents move to compressed monthly archive collections
+RETENTION_POLICIES = {  # {collection: days to keep in the live collection, 0 = keep forever}
+    "messages": int(os.getenv("RETENTION_DAYS_MESSAGES", "365")),
+    "locations": int(os.getenv("RETENTION_DAYS_LOCATIONS", "30")),
+    "checkins": int(os.getenv("RETENTION_DAYS_CHECKINS", "180")),
+    "emergency_broadcasts": int(os.getenv("RETENTION_DAYS_EMERGENCY_BROADCASTS", "365"))
+}
+ARCHIVE_INTERVAL_SECONDS = float(os.getenv("ARCHIVE_INTERVAL_SECONDS", "3600"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+ARCHIVE_BATCH_PAUSE_SECONDS = float(os.getenv("ARCHIVE_BATCH_PAUSE_SECONDS", "1"))
+ARCHIVE_COMPRESSOR = os.getenv("ARCHIVE_COMPRESSOR", "zstd")
+ARCHIVE_FILTERS = {  # extra conditions per collection - unread private messages stay live for the unread counters
+    "messages": {"is_read": {"$ne": False}}
+}
+archive_collections = set()  # archive collections known to exist
+archive_compressor_supported = True  # False once the server rejected ARCHIVE_COMPRESSOR
+
+def archive_collection_name(collection_name: str, timestamp: datetime) -> str:
+    return f"archive_{collection_name}_{timestamp.year:04d}_{timestamp.month:02d}"
+
+def archive_months(start: datetime, end: datetime) -> List[datetime]:
+    """First day of every month touched by [start, end]"""
+    months = []
+    current = datetime(start.year, start.month, 1)
+    while current <= end:
+        months.append(current)
+        current = datetime(current.year + current.month // 12, current.month % 12 + 1, 1)
+    return months
+
+async def get_archive_collection(name: str):
+    """Archive collection with block compression, created on first use"""
+    global archive_compressor_supported
+    if name not in archive_collections:
+        try:
+            if archive_compressor_supported:
+                try:
+                    await db.create_collection(
+                        name,
+                        storageEngine={"wiredTiger": {"configString": f"block_compressor={ARCHIVE_COMPRESSOR}"}}
+                    )
+                except OperationFailure as e:
+                    archive_compressor_supported = False
+                    logger.warning(f"Archive compressor {ARCHIVE_COMPRESSOR} rejected ({e}) - using the server default")
+            if not archive_compressor_supported:
+                await db.create_collection(name)
+        except CollectionInvalid:
+            pass  # already exists
+        await db[name].create_index("timestamp")
+        archive_collections.add(name)
+    return db[name]
+
+async def archive_batch(collection_name: str, cutoff: datetime) -> int:
+    """Move up to ARCHIVE_BATCH_SIZE documents older than cutoff into their monthly archive"""
+    documents = await db[collection_name].find(
+        {"timestamp": {"$lt": cutoff}, **ARCHIVE_FILTERS.get(collection_name, {})}
+    ).sort("timestamp", 1).limit(ARCHIVE_BATCH_SIZE).to_list(ARCHIVE_BATCH_SIZE)
+    if not documents:
+        return 0
+    
+    by_month = {}
+    for document in documents:
+        by_month.setdefault(archive_collection_name(collection_name, document["timestamp"]), []).append(document)
+    
+    # Upserts by _id keep a retried batch from duplicating documents
+    for name, month_documents in by_month.items():
+        archive = await get_archive_collection(name)
+        await archive.bulk_write(
+            [ReplaceOne({"_id": d["_id"]}, d, upsert=True) for d in month_documents],
+            ordered=False
+        )
+    
+    await db[collection_name].delete_many({"_id": {"$in": [d["_id"] for d in documents]}})
+    
+    # Archived documents leave the live collection - /sync clients drop them like deletions
+    tombstones = [build_tombstone(collection_name, d, reason="archived") for d in documents if d.get("id")]
+    if collection_name in SYNC_COLLECTIONS and tombstones:
+        await db.tombstones.insert_many(tombstones)
+    if collection_name == "messages":
+        archived_per_conversation = {}
+        for d in documents:
+            if d.get("recipient_id"):
+                conversation_id = private_room_name(d.get("sender_id"), d["recipient_id"])
+                archived_per_conversation[conversation_id] = archived_per_conversation.get(conversation_id, 0) + 1
+        if archived_per_conversation:
+            await db.conversations.bulk_write([
+                UpdateOne({"id": conversation_id}, {"$inc": {"message_count": -count}})
+                for conversation_id, count in archived_per_conversation.items()
+            ], ordered=False)
+    return len(documents)
+
+async def run_archiver() -> Dict[str, int]:
+    """Archive every collection with a retention policy in bounded, throttled batches"""
+    moved = {}
+    for collection_name, retention_days in RETENTION_POLICIES.items():
+        if retention_days <= 0:
+            continue
+        cutoff = datetime.utcnow() - timedelta(days=retention_days)
+        moved[collection_name] = 0
+        while True:
+            count = await archive_batch(collection_name, cutoff)
+            moved[collection_name] += count
+            if count < ARCHIVE_BATCH_SIZE:
+                break
+            # Yield to live traffic between batches
+            await asyncio.sleep(ARCHIVE_BATCH_PAUSE_SECONDS)
+    return moved
+
+async def archiver_loop():
+    """Background task running the archiver every ARCHIVE_INTERVAL_SECONDS"""
+    while True:
+        try:
+            moved = await run_archiver()
+            if any(moved.values()):
+                logger.info(f"Archived documents: {moved}")
+        except Exception as e:
+            logger.error(f"Archiver error: {str(e)}")
+        await asyncio.sleep(ARCHIVE_INTERVAL_SECONDS)
+
+@api_router.get("/admin/archive/{collection_name}")
+async def get_archived_documents(
+    collection_name: str,
+    start: datetime,
+    end: datetime,
+    limit: int = 100,
+    current_user: User = Depends(get_current_user)
+):
+    """Query archived documents of one collection within a time range (Admin only)"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    if collection_name not in RETENTION_POLICIES:
+        raise HTTPException(status_code=404, detail="Collection is not archived")
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    
+    limit = max(1, min(limit, 1000))
+    existing = set(await db.list_collection_names(filter={"name": {"$regex": f"^archive_{collection_name}_"}}))
+    
+    documents = []
+    for month in archive_months(start, end):
+        name = archive_collection_name(collection_name, month)
+        if name not in existing:
+            continue
+        remaining = limit - len(documents)
+        documents.extend(await db[name].find(
+            {"timestamp": {"$gte": start, "$lte": end}}, {"_id": 0}
+        ).sort("timestamp", 1).limit(remaining).to_list(remaining))
+        if len(documents) >= limit:
+            break
+    
+    return {"collection": collection_name, "count": len(documents), "documents": documents}
+
+# Event bus - change stream (polling fallback on standalone servers) -> normalized domain events.
+# Sees writes from every process, including init_users.py and manual maintenance.
+EVENT_BUS_ENABLED = os.getenv("EVENT_BUS_ENABLED", "true").lower() == "true"
+EVENT_BUS_CONSUMER_ID = os.getenv("EVENT_BUS_CONSUMER_ID", "default")
+EVENT_BUS_POLL_INTERVAL_SECONDS = float(os.getenv("EVENT_BUS_POLL_INTERVAL_SECONDS", "2"))
+EVENT_BUS_CHECKPOINT_SECONDS = float(os.getenv("EVENT_BUS_CHECKPOINT_SECONDS", "1"))
+EVENT_BUS_COLLECTIONS = {  # {collection: (event name prefix, high-water field for polling)}
+    "incidents": ("incident", "updated_at"),
+    "persons": ("person", "updated_at"),
+    "messages": ("message", "timestamp"),
+    "users": ("user", "updated_at"),
+}
+EVENT_BUS_ROLES = {  # {collection: roles that may subscribe to its events room} - messages have no global room
+    "incidents": {UserRole.ADMIN, UserRole.POLICE, UserRole.TRAINEE},
+    "persons": {UserRole.ADMIN, UserRole.POLICE},
+    "users": {UserRole.ADMIN, UserRole.POLICE},
+}
+EVENT_BUS_HIDDEN_FIELDS = ("_id", "hashed_password", "password_hash")
+EVENT_BUS_USER_FIELDS = (  # user documents are published with this projection only
+    "id", "username", "role", "status", "rank", "department", "badge_number",
+    "patrol_team", "assigned_district", "is_active", "created_at", "updated_at"
+)
+EVENT_BUS_IGNORED_UPDATES = {"users": {"last_activity", "updated_at"}}  # heartbeat noise
+EVENT_OPERATIONS = {"insert": "created", "update": "updated", "replace": "updated", "delete": "deleted"}
+
+def domain_event_rooms(collection_name: str, document: Optional[dict]) -> List[str]:
+    """Socket.IO rooms a domain event is published to"""
+    if collection_name != "messages":
+        return [f"events_{collection_name}"]
+    if not document:
+        return []  # deleted message - the change stream has no recipients to address
+    if document.get("recipient_id"):
+        return [f"user_{document.get('sender_id')}", f"user_{document['recipient_id']}"]
+    return [f"channel_{document.get('channel', 'general')}"]
+
+async def publish_domain_event(collection_name: str, operation: str, document: Optional[dict], document_key=None):
+    """Emit one normalized domain_event and invalidate ETags of the collection"""
+    bump_version(collection_name)
+    prefix = EVENT_BUS_COLLECTIONS[collection_name][0]
+    action = EVENT_OPERATIONS.get(operation, operation)
+    rooms = domain_event_rooms(collection_name, document)
+    if not rooms:
+        return
+    if document is not None and collection_name == "users":
+        document = {k: document[k] for k in EVENT_BUS_USER_FIELDS if k in document}
+    elif document is not None:
+        document = {k: v for k, v in document.items() if k not in EVENT_BUS_HIDDEN_FIELDS}
+    event = {
+        "type": f"{prefix}.{action}",
+        "collection": collection_name,
+        "operation": action,
+        "id": document.get("id") if document else None,
+        "document_key": str(document_key) if document_key is not None else None,
+        "document": document,
+        "timestamp": datetime.utcnow()
+    }
+    await sio.emit('domain_event', event, to=rooms)
+
+async def load_event_bus_state(key: str):
+    state = await db.event_bus_state.find_one({"_id": f"{EVENT_BUS_CONSUMER_ID}:{key}"})
+    return state.get("value") if state else None
+
+async def save_event_bus_state(key: str, value):
+    await db.event_bus_state.update_one(
+        {"_id": f"{EVENT_BUS_CONSUMER_ID}:{key}"},
+        {"$set": {"value": value, "updated_at": datetime.utcnow()}},
+        upsert=True
+    )
+
+async def consume_change_stream():
+    """Publish changes from a change stream, persisting the resume token so restarts lose nothing"""
+    resume_token = await load_event_bus_state("resume_token")
+    pipeline = [{"$match": {
+        "ns.coll": {"$in": list(EVENT_BUS_COLLECTIONS)},
+        "operationType": {"$in": list(EVENT_OPERATIONS)}
+    }}]
+    last_checkpoint = time.monotonic()
+    async with db.watch(pipeline, full_document="updateLookup", resume_after=resume_token) as stream:
+        try:
+            while stream.alive:
+                change = await stream.try_next()
+                if change is not None:
+                    collection_name = change["ns"]["coll"]
+                    updated_fields = set(change.get("updateDescription", {}).get("updatedFields", {}))
+                    ignored = EVENT_BUS_IGNORED_UPDATES.get(collection_name)
+                    if not (change["operationType"] == "update" and ignored and updated_fields <= ignored):
+                        await publish_domain_event(
+                            collection_name,
+                            change["operationType"],
+                            change.get("fullDocument"),
+                            change.get("documentKey", {}).get("_id")
+                        )
+                if time.monotonic() - last_checkpoint >= EVENT_BUS_CHECKPOINT_SECONDS and stream.resume_token:
+                    await save_event_bus_state("resume_token", stream.resume_token)
+                    last_checkpoint = time.monotonic()
+        finally:
+            if stream.resume_token:
+                await save_event_bus_state("resume_token", stream.resume_token)
+
+async def poll_for_changes():
+    """Fallback for standalone servers: poll high-water marks (inserts and updates only)"""
+    high_water = {}  # {collection: {"at": timestamp, "id": id}} - (timestamp, id) so equal timestamps page correctly
+    for collection_name, (_prefix, field) in EVENT_BUS_COLLECTIONS.items():
+        state = await load_event_bus_state(f"poll:{collection_name}")
+        if isinstance(state, datetime):  # checkpoint written before ids were tracked
+            state = {"at": state, "id": ""}
+        high_water[collection_name] = state or {"at": datetime.utcnow(), "id": ""}
+    
+    while True:
+        for collection_name, (_prefix, field) in EVENT_BUS_COLLECTIONS.items():
+            mark = high_water[collection_name]
+            documents = await db[collection_name].find(
+                after_cursor(field, mark["at"], mark["id"])
+            ).sort([(field, 1), ("id", 1)]).limit(500).to_list(500)
+            for document in documents:
+                # Created after the previous high-water mark: subscribers have not seen it yet
+                created = document.get("created_at") or document.get("timestamp")
+                is_new = created is not None and (created, document.get("id") or "") > (mark["at"], mark["id"])
+                operation = "insert" if is_new else "update"
+                await publish_domain_event(collection_name, operation, document, document.get("_id"))
+            if documents:
+                high_water[collection_name] = {"at": documents[-1][field], "id": documents[-1].get("id") or ""}
+                await save_event_bus_state(f"poll:{collection_name}", high_water[collection_name])
+        await asyncio.sleep(EVENT_BUS_POLL_INTERVAL_SECONDS)
+
+async def event_bus_loop():
+    """Run the change stream consumer, falling back to polling where change streams are unavailable"""
+    while True:
+        try:
+            await consume_change_stream()
+        except OperationFailure as e:
+            if e.code == 40573 or "replica set" in str(e):
+                logger.info("Change streams unavailable (standalone MongoDB) - event bus polls instead")
+                await poll_for_changes()
+                return
+            if e.code in (260, 280, 286):  # invalid / lost resume token - restart from now
+                logger.error(f"Event bus resume token rejected, restarting from now: {str(e)}")
+                await db.event_bus_state.delete_one({"_id": f"{EVENT_BUS_CONSUMER_ID}:resume_token"})
+            else:
+                logger.error(f"Event bus change stream error: {str(e)}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Event bus error: {str(e)}")
+        await asyncio.sleep(EVENT_BUS_POLL_INTERVAL_SECONDS)
+
 # Include router - MUST be after all endpoint definitions
 app.include_router(api_router)
 
-# Mount static files from frontend build
-FRONTEND_BUILD_DIR = Path(__file__).parent.parent / "frontend" / "dist"
-FRONTEND_STATIC_DIR = Path(__file__).parent.parent / "frontend" / "dist" / "_expo"
-
+# Serve frontend build - index.html is kept in memory, other files go through PrecompressedStaticFiles
 if FRONTEND_BUILD_DIR.exists():
-    # Mount static assets
-    if FRONTEND_STATIC_DIR.exists():
-        app.mount("/_expo", StaticFiles(directory=str(FRONTEND_STATIC_DIR)), name="static")
-    
-    # Mount assets
-    assets_dir = FRONTEND_BUILD_DIR / "assets"
-    if assets_dir.exists():
-        app.mount("/assets", StaticFiles(directory=str(assets_dir)), name="assets")
+    frontend_files = PrecompressedStaticFiles(directory=str(FRONTEND_BUILD_DIR))
+    index_file = FRONTEND_BUILD_DIR / "index.html"
+    index_html = index_file.read_bytes() if index_file.exists() else None
+    index_etag = f'"{hashlib.md5(index_html).hexdigest()}"' if index_html else None
+    
+    def serve_index_html(request: Request):
+        if index_html is None:
+            return {"message": "Frontend not available"}
+        headers = {"ETag": index_etag, "Cache-Control": "public, no-cache"}
+        cached = not_modified(request, index_etag, headers)
+        if cached:
+            return cached
+        return HTMLResponse(content=index_html, headers=headers)
     
     # Serve index.html for root
     @app.get("/")
-    async def serve_index():
-        index_path = FRONTEND_BUILD_DIR / "index.html"
-        if index_path.exists():
-            return FileResponse(str(index_path))
-        return {"message": "Frontend not available"}
+    async def serve_index(request: Request):
+        return serve_index_html(request)
     
     # Serve frontend for all non-API routes
     @app.get("/{full_path:path}")
-    async def serve_frontend(full_path: str):
+    async def serve_frontend(full_path: str, request: Request):
         """Serve the frontend application for all non-API routes"""
         # Skip API routes
         if full_path.startswith("api/"):
             raise HTTPException(status_code=404, detail="API endpoint not found")
         
         # Check for specific files first
-        if full_path:
-            file_path = FRONTEND_BUILD_DIR / full_path
-            if file_path.is_file():
-                return FileResponse(str(file_path))
+        if full_path and full_path != "index.html":
+            try:
+                return await frontend_files.get_response(full_path, request.scope)
+            except StarletteHTTPException:
+                pass
         
         # Serve index.html for SPA routes
-        index_path = FRONTEND_BUILD_DIR / "index.html"
-        if index_path.exists():
-            return FileResponse(str(index_path))
-        
-        # Fallback
-        return FileResponse(str(FRONTEND_BUILD_DIR / "index.html"))
+        return serve_index_html(request)
 else:
     @app.get("/")
     async def root_no_frontend():
@@ -2248,12 +4750,12 @@ async def create_team(team_data: dict, current_user: User = Depends(get_current_
         # Insert team
         await db.teams.insert_one(team_dict)
         
-        print(f"✅ Team '{team_dict['name']}' erstellt von {current_user.username}")
+        logger.info(f"✅ Team '{team_dict['name']}' erstellt von {current_user.username}")
         
         return serialize_mongo_data(team_dict)
         
     except Exception as e:
-        print(f"❌ Fehler beim Team-Erstellen: {str(e)}")
+        logger.error(f"❌ Fehler beim Team-Erstellen: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 # Get teams
@@ -2261,10 +4763,10 @@ async def create_team(team_data: dict, current_user: User = Depends(get_current_
 async def get_teams(current_user: User = Depends(get_current_user)):
     """Get all teams"""
     try:
-        teams = await db.teams.find().to_list(100)
-        return serialize_mongo_data(teams)
+        teams = await db.teams.find({}, {"_id": 0}).to_list(100)
+        return MongoJSONResponse(teams)
     except Exception as e:
-        print(f"❌ Fehler beim Laden der Teams: {str(e)}")
+        logger.error(f"❌ Fehler beim Laden der Teams: {str(e)}")
         return []
 
 # ✅ NEU: Admin teams endpoint for team management
@@ -2286,11 +4788,38 @@ async def get_admin_teams(current_user: User = Depends(get_current_user)):
         
         return serialize_mongo_data(teams)
     except Exception as e:
-        print(f"❌ Fehler beim Laden der Admin-Teams: {e}")
+        logger.error(f"❌ Fehler beim Laden der Admin-Teams: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.on_event("startup")
+async def start_background_tasks():
+    await warm_up_connection_pool()
+    try:
+        await ensure_indexes()
+        await backfill_conversations()
+        await backfill_unread_counters()
+    except Exception as e:
+        logger.error(f"❌ Database startup tasks failed: {e}")
+    spawn_background_task(heartbeat_flush_loop())
+    spawn_background_task(archiver_loop())
+    spawn_background_task(notification_dispatcher_loop())
+    if EVENT_BUS_ENABLED:
+        spawn_background_task(event_bus_loop())
+    if METRICS_ENABLED:
+        spawn_background_task(socket_backpressure_loop())
+    if LOOP_WATCHDOG_ENABLED:
+        start_loop_watchdog()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    loop_watchdog_stop.set()
+    tasks = list(background_tasks)
+    for task in tasks:
+        task.cancel()
+    # Let cancelled tasks unwind (an interrupted heartbeat flush requeues its batch) before the final flush
+    if tasks:
+        await asyncio.wait(tasks, timeout=SHUTDOWN_TASK_TIMEOUT_SECONDS)
+    await flush_heartbeats()
     client.close()
 
 # Server starten
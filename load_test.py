@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Load Testing for Stadtwache App
+Boots the backend against a throwaway MongoDB database (or targets a running one),
+seeds users/incidents/messages and drives mixed workloads concurrently:
+login waves, heartbeat storms, GPS pings, chat bursts and dashboard polling
+over HTTP (httpx) and Socket.IO (python-socketio).
+
+Usage:
+    python load_test.py --users 100 --duration 60
+    python load_test.py --url http://localhost:8001 --no-seed --email admin@stadtwache.de --password admin123
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import httpx
+import socketio
+from motor.motor_asyncio import AsyncIOMotorClient
+from passlib.context import CryptContext
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+LOADTEST_PASSWORD = "loadtest123"
+SCENARIOS = ("login", "heartbeat", "gps", "chat", "dashboard", "socket")
+
+
+class LoadStats:
+    """Latencies and errors per endpoint / socket event"""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.received = defaultdict(int)  # socket broadcasts received by the clients
+        self.started_at = time.perf_counter()
+
+    def record(self, name, seconds, ok=True):
+        self.samples[name].append(seconds)
+        if not ok:
+            self.errors[name] += 1
+
+    async def timed_request(self, client, name, method, url, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            self.record(name, time.perf_counter() - start, response.status_code < 400)
+            return response
+        except httpx.HTTPError:
+            self.record(name, time.perf_counter() - start, False)
+            return None
+
+    def report(self):
+        elapsed = time.perf_counter() - self.started_at
+        print(f"\n📊 Load test results - {elapsed:.1f} s")
+        print(f"  {'endpoint / event':<36} {'count':>7} {'req/s':>8} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        for name in sorted(self.samples):
+            samples = sorted(self.samples[name])
+            print(
+                f"  {name:<36} {len(samples):>7} {len(samples) / elapsed:>8.1f} {self.errors[name]:>7}"
+                f" {percentile(samples, 0.5) * 1000:>9.1f} {percentile(samples, 0.95) * 1000:>9.1f}"
+                f" {percentile(samples, 0.99) * 1000:>9.1f}"
+            )
+        for event, count in sorted(self.received.items()):
+            print(f"  received {event:<27} {count:>7} {count / elapsed:>8.1f}")
+
+
+def percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+# Setup - local backend and seed data
+async def seed_database(mongo_url, db_name, users, incidents, messages):
+    """Fresh load-test database with N users (first one admin), incidents and messages"""
+    if "loadtest" not in db_name:
+        raise SystemExit(f"❌ Refusing to drop {db_name} - the load-test database name must contain 'loadtest'")
+    client = AsyncIOMotorClient(mongo_url)
+    await client.drop_database(db_name)
+    db = client[db_name]
+    now = datetime.utcnow()
+    hashed_password = CryptContext(schemes=["bcrypt"], deprecated="auto").hash(LOADTEST_PASSWORD)
+
+    user_docs = [
+        {
+            "id": str(uuid.uuid4()),
+            "email": f"loadtest-{i}@stadtwache.de",
+            "username": f"Lasttest {i}",
+            "role": "admin" if i == 0 else "police",
+            "badge_number": f"LT-{i:04d}",
+            "department": "Streifendienst",
+            "status": "Im Dienst",
+            "is_active": True,
+            "created_at": now,
+            "updated_at": now,
+            "hashed_password": hashed_password
+        }
+        for i in range(users)
+    ]
+    await db.users.insert_many(user_docs)
+    await db.incidents.insert_many([
+        {
+            "id": str(uuid.uuid4()),
+            "title": f"Vorfall {i}",
+            "description": "Ruhestörung in der Innenstadt",
+            "priority": ("high", "medium", "low")[i % 3],
+            "status": "open",
+            "location": {"lat": 51.2879 + i * 0.0001, "lng": 7.2954 + i * 0.0001},
+            "address": f"Hauptstraße {i}, 58332 Schwelm",
+            "reported_by": user_docs[i % users]["username"],
+            "images": [],
+            "created_at": now - timedelta(minutes=i),
+            "updated_at": now - timedelta(minutes=i)
+        }
+        for i in range(incidents)
+    ])
+    if messages:
+        await db.messages.insert_many([
+            {
+                "id": str(uuid.uuid4()),
+                "content": f"Nachricht {i}",
+                "sender_id": user_docs[i % users]["id"],
+                "sender_name": user_docs[i % users]["username"],
+                "channel": "general",
+                "timestamp": now - timedelta(seconds=i),
+                "created_at": now - timedelta(seconds=i),
+                "message_type": "text"
+            }
+            for i in range(messages)
+        ])
+    client.close()
+    print(f"🌱 Seeded {db_name}: {users} users, {incidents} incidents, {messages} messages")
+    return [(user["email"], LOADTEST_PASSWORD) for user in user_docs]
+
+
+def start_backend(port, mongo_url, db_name):
+    env = dict(os.environ, MONGO_URL=mongo_url, DB_NAME=db_name)
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:socket_app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env
+    )
+
+
+async def wait_for_backend(base_url, timeout=60):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(f"{base_url}/api/app/config")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.5)
+    raise RuntimeError(f"Backend did not come up at {base_url}")
+
+
+# Workloads - one coroutine per virtual user and scenario
+class VirtualUser:
+    def __init__(self, index, email, password):
+        self.index = index
+        self.email = email
+        self.password = password
+        self.token = None
+        self.user = None
+
+    @property
+    def headers(self):
+        return {"Authorization": f"Bearer {self.token}"}
+
+
+async def login(stats, client, vuser):
+    response = await stats.timed_request(
+        client, "POST /api/auth/login", "POST", "/api/auth/login",
+        json={"email": vuser.email, "password": vuser.password}
+    )
+    if response is not None and response.status_code == 200:
+        body = response.json()
+        vuser.token = body["access_token"]
+        vuser.user = body.get("user") or {}
+
+
+async def login_wave(stats, client, vusers, deadline, interval):
+    """Everybody logs in at once, e.g. at shift change"""
+    while time.monotonic() < deadline:
+        await asyncio.gather(*(login(stats, client, vuser) for vuser in vusers))
+        await asyncio.sleep(interval)
+
+
+async def heartbeat_storm(stats, client, vuser, deadline, interval):
+    await asyncio.sleep(random.random() * interval)
+    while time.monotonic() < deadline:
+        await stats.timed_request(client, "POST /api/users/heartbeat", "POST", "/api/users/heartbeat",
+                                  headers=vuser.headers)
+        await asyncio.sleep(interval)
+
+
+async def gps_pings(stats, client, vuser, deadline, interval):
+    lat, lng = 51.2879 + random.uniform(-0.01, 0.01), 7.2954 + random.uniform(-0.01, 0.01)
+    while time.monotonic() < deadline:
+        lat += random.uniform(-0.0002, 0.0002)
+        lng += random.uniform(-0.0002, 0.0002)
+        await stats.timed_request(
+            client, "POST /api/locations/update", "POST", "/api/locations/update", headers=vuser.headers,
+            json={"user_id": vuser.user.get("id", ""), "location": {"lat": lat, "lng": lng}}
+        )
+        await asyncio.sleep(interval)
+
+
+async def chat_bursts(stats, client, vuser, deadline, interval, burst_size=5):
+    await asyncio.sleep(random.random() * interval)
+    while time.monotonic() < deadline:
+        for i in range(burst_size):
+            await stats.timed_request(
+                client, "POST /api/messages", "POST", "/api/messages", headers=vuser.headers,
+                json={"content": f"Lasttest {vuser.index}/{i}", "channel": "general"}
+            )
+        await asyncio.sleep(interval)
+
+
+async def dashboard_polling(stats, client, vuser, deadline, interval):
+    """Polls like the dashboard does - with If-None-Match, so 304s are part of the picture"""
+    paths = ["/api/incidents", "/api/users/by-status", "/api/messages?channel=general"]
+    if vuser.user.get("role") == "admin":
+        paths.append("/api/admin/stats")
+    etags = {}
+    while time.monotonic() < deadline:
+        for path in paths:
+            headers = dict(vuser.headers)
+            if path in etags:
+                headers["If-None-Match"] = etags[path]
+            response = await stats.timed_request(client, f"GET {path.split('?')[0]}", "GET", path, headers=headers)
+            if response is not None and response.headers.get("etag"):
+                etags[path] = response.headers["etag"]
+        await asyncio.sleep(interval)
+
+
+async def socket_client(stats, base_url, vuser, deadline, interval):
+    """Socket.IO client - per-event latency measured as emit-to-ack round trip"""
+    sio = socketio.AsyncClient(reconnection=False)
+    for event in ("location_updated", "new_message", "incident_updated"):
+        sio.on(event, lambda *_args, event=event: stats.received.__setitem__(event, stats.received[event] + 1))
+
+    start = time.perf_counter()
+    try:
+        await sio.connect(base_url, transports=["websocket"], socketio_path="socket.io")
+    except socketio.exceptions.ConnectionError:
+        stats.record("socket connect", time.perf_counter() - start, False)
+        return
+    stats.record("socket connect", time.perf_counter() - start)
+
+    async def timed_call(event, data):
+        start = time.perf_counter()
+        try:
+            await sio.call(event, data, timeout=10)
+            stats.record(f"socket {event}", time.perf_counter() - start)
+        except socketio.exceptions.TimeoutError:
+            stats.record(f"socket {event}", time.perf_counter() - start, False)
+
+    user_id = vuser.user.get("id", "")
+    await timed_call("join_user_room", user_id)
+    await timed_call("join_channel", "general")
+    try:
+        while time.monotonic() < deadline:
+            await timed_call("location_update", {
+                "user_id": user_id,
+                "location": {"lat": 51.2879 + random.uniform(-0.01, 0.01), "lng": 7.2954 + random.uniform(-0.01, 0.01)}
+            })
+            if random.random() < 0.2:
+                await timed_call("send_message", {
+                    "channel": "general", "content": f"Socket-Lasttest {vuser.index}", "sender_id": user_id
+                })
+            await asyncio.sleep(interval)
+    finally:
+        await sio.disconnect()
+
+
+async def run_load_test(args, base_url, credentials):
+    stats = LoadStats()
+    vusers = [VirtualUser(i, email, password) for i, (email, password) in enumerate(credentials)]
+    limits = httpx.Limits(max_connections=args.connections, max_keepalive_connections=args.connections)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        print(f"🔑 Logging in {len(vusers)} users")
+        await asyncio.gather(*(login(stats, client, vuser) for vuser in vusers))
+        vusers = [vuser for vuser in vusers if vuser.token]
+        if not vusers:
+            print("❌ No user could log in - aborting")
+            return stats
+
+        deadline = time.monotonic() + args.duration
+        tasks = []
+        if "login" in args.scenarios:
+            tasks.append(login_wave(stats, client, vusers, deadline, args.login_interval))
+        for vuser in vusers:
+            if "heartbeat" in args.scenarios:
+                tasks.append(heartbeat_storm(stats, client, vuser, deadline, args.heartbeat_interval))
+            if "gps" in args.scenarios:
+                tasks.append(gps_pings(stats, client, vuser, deadline, args.gps_interval))
+            if "chat" in args.scenarios:
+                tasks.append(chat_bursts(stats, client, vuser, deadline, args.chat_interval))
+            if "dashboard" in args.scenarios:
+                tasks.append(dashboard_polling(stats, client, vuser, deadline, args.dashboard_interval))
+        if "socket" in args.scenarios:
+            for vuser in vusers[:args.socket_clients]:
+                tasks.append(socket_client(stats, base_url, vuser, deadline, args.gps_interval))
+
+        print(f"🚀 Running {len(tasks)} workers for {args.duration} s - scenarios: {', '.join(args.scenarios)}")
+        stats.started_at = time.perf_counter()
+        await asyncio.gather(*tasks)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=os.getenv("LOADTEST_URL"),
+                        help="Target a running backend instead of booting one")
+    parser.add_argument("--mongo-url", default=os.getenv("LOADTEST_MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default=os.getenv("LOADTEST_DB_NAME", "stadtwache_loadtest"))
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--no-seed", action="store_true", help="Use existing users (--email/--password)")
+    parser.add_argument("--email", default="admin@stadtwache.de")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--incidents", type=int, default=500)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--connections", type=int, default=200)
+    parser.add_argument("--socket-clients", type=int, default=50)
+    parser.add_argument("--login-interval", type=float, default=20)
+    parser.add_argument("--heartbeat-interval", type=float, default=5)
+    parser.add_argument("--gps-interval", type=float, default=2)
+    parser.add_argument("--chat-interval", type=float, default=10)
+    parser.add_argument("--dashboard-interval", type=float, default=3)
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for reproducible workloads")
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    if args.no_seed:
+        credentials = [(args.email, args.password)] * args.users
+    else:
+        credentials = asyncio.run(seed_database(args.mongo_url, args.db, args.users, args.incidents, args.messages))
+
+    backend = None
+    base_url = args.url
+    if not base_url:
+        base_url = f"http://127.0.0.1:{args.port}"
+        backend = start_backend(args.port, args.mongo_url, args.db)
+        print(f"🔧 Started backend on {base_url} (database {args.db})")
+
+    try:
+        if backend:
+            asyncio.run(wait_for_backend(base_url))
+        stats = asyncio.run(run_load_test(args, base_url, credentials))
+        stats.report()
+    finally:
+        if backend:
+            backend.terminate()
+            backend.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
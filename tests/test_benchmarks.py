@@ -0,0 +1,146 @@
+"""
+Hot-path benchmarks (pytest-benchmark) on synthetic data of realistic size:
+get_current_user, serialize_mongo_data, User/Incident construction and the
+/users/by-status and /reports/folders handlers, with repositories on the in-memory FakeDatabase.
+
+Run from the repository root:
+    python -m pytest tests/test_benchmarks.py                                       # measure
+    python -m pytest tests/test_benchmarks.py --benchmark-autosave                  # store a run in .benchmarks/
+    python -m pytest tests/test_benchmarks.py --benchmark-compare \\
+        --benchmark-compare-fail=mean:20%                                           # fail on >20% regressions
+Timings depend on the machine, so baselines are saved on the machine that compares against them.
+Plain test runs can skip the measurements with --benchmark-disable.
+"""
+
+import asyncio
+import os
+import sys
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+pytest.importorskip("fastapi")
+pytest.importorskip("motor")
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend")))
+from fastapi.security import HTTPAuthorizationCredentials  # noqa: E402
+from starlette.requests import Request  # noqa: E402
+
+import server  # noqa: E402
+from repositories import FakeDatabase, Repositories  # noqa: E402
+from server import Incident, User, create_access_token, serialize_mongo_data  # noqa: E402
+
+sys.path.insert(0, os.path.join(os.path.dirname(server.__file__), "benchmarks"))
+from bench_serialization import make_incidents  # noqa: E402
+
+STATUSES = ("Im Dienst", "Pause", "Einsatz", "Streife", "Nicht verfügbar")
+
+
+def make_users(count):
+    """User documents shaped like db.users results"""
+    now = datetime.utcnow()
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "email": f"beamter{i}@stadtwache.de",
+            "username": f"Beamter {i}",
+            "role": "admin" if i == 0 else "police",
+            "badge_number": f"SW-{i:03d}",
+            "department": "Streifendienst",
+            "phone": "+49 2336 000000",
+            "service_number": str(100 + i),
+            "rank": "Hauptwachtmeister",
+            "status": STATUSES[i % len(STATUSES)],
+            "last_activity": now - timedelta(seconds=30 * i),
+            "patrol_team": f"Team {i % 6}",
+            "assigned_district": f"Bezirk {i % 4}",
+            "created_at": now,
+            "updated_at": now,
+            "hashed_password": "$2b$12$" + "x" * 53
+        }
+        for i in range(count)
+    ]
+
+
+def make_reports(count, author_id):
+    """Report documents spread over two years"""
+    now = datetime.utcnow()
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "title": f"Schichtbericht {i}",
+            "content": "Streife ohne besondere Vorkommnisse. " * 20,
+            "author_id": author_id,
+            "author_name": "Beamter 0",
+            "shift_date": (now - timedelta(hours=8 * i)).strftime("%Y-%m-%d"),
+            "created_at": now - timedelta(hours=8 * i),
+            "status": "submitted"
+        }
+        for i in range(count)
+    ]
+
+
+def make_request(path):
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": b"", "headers": []})
+
+
+@pytest.fixture(scope="module")
+def users():
+    return make_users(100)
+
+
+@pytest.fixture(scope="module")
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture
+def fake_repositories(users, monkeypatch):
+    """Repositories on the in-memory backend keep the database round trip out of the measurement"""
+    database = FakeDatabase({"users": users, "reports": make_reports(1000, users[0]["id"])})
+    monkeypatch.setattr(server, "repositories", Repositories(database))
+    monkeypatch.setattr(server, "read_db", lambda endpoint: database)
+    return database
+
+
+def test_get_current_user(benchmark, users, loop, fake_repositories):
+    credentials = HTTPAuthorizationCredentials(
+        scheme="Bearer",
+        credentials=create_access_token({"sub": users[1]["email"], "user_id": users[1]["id"], "role": "police"})
+    )
+    user = benchmark(lambda: loop.run_until_complete(server.get_current_user(credentials)))
+    assert user.id == users[1]["id"]
+
+
+def test_serialize_mongo_data(benchmark):
+    incidents = make_incidents(100)
+    assert len(benchmark(serialize_mongo_data, incidents)) == 100
+
+
+def test_user_construction(benchmark, users):
+    assert len(benchmark(lambda: [User(**user) for user in users])) == 100
+
+
+def test_incident_construction(benchmark):
+    documents = [{k: v for k, v in d.items() if k != "_id"} for d in make_incidents(100)]
+    assert len(benchmark(lambda: [Incident(**document) for document in documents])) == 100
+
+
+def test_users_by_status_handler(benchmark, users, loop, fake_repositories):
+    current_user = User(**users[0])
+    response = benchmark(lambda: loop.run_until_complete(
+        server.get_users_by_status(make_request("/api/users/by-status"), current_user)
+    ))
+    assert response.status_code == 200
+
+
+def test_report_folders_handler(benchmark, users, loop, fake_repositories):
+    current_user = User(**users[0])
+    response = benchmark(lambda: loop.run_until_complete(
+        server.get_report_folders(make_request("/api/reports/folders"), current_user)
+    ))
+    assert response.status_code == 200
@@ -0,0 +1,158 @@
+"""
+Semantics of the in-memory FakeDatabase behind repositories.py
+The benchmarks run handler logic against it, so it has to answer like MongoDB for the queries they use.
+Run from the repository root: python -m pytest tests
+"""
+
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend")))
+from repositories import (  # noqa: E402
+    FakeDatabase, Repositories, _apply_update, _matches, _project
+)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+# _matches
+def test_matches_equality_and_dotted_paths():
+    document = {"id": "a", "status": "open", "location": {"city": "Schwelm"}}
+    assert _matches(document, {"id": "a", "status": "open"})
+    assert _matches(document, {"location.city": "Schwelm"})
+    assert not _matches(document, {"status": "closed"})
+    assert not _matches(document, {"location.street": "Hauptstraße"})
+
+
+def test_matches_operators():
+    document = {"status": "open", "priority": 3}
+    assert _matches(document, {"status": {"$in": ["open", "new"]}})
+    assert not _matches(document, {"status": {"$nin": ["open"]}})
+    assert _matches(document, {"status": {"$ne": "closed"}})
+    assert _matches(document, {"priority": {"$gt": 2, "$lte": 3}})
+    assert not _matches(document, {"priority": {"$lt": 3}})
+
+
+def test_matches_missing_fields():
+    document = {"recipient_id": None}
+    assert _matches(document, {"is_read": {"$ne": False}})
+    assert _matches(document, {"is_read": {"$exists": False}})
+    assert not _matches(document, {"is_read": {"$exists": True}})
+    assert not _matches(document, {"timestamp": {"$lt": datetime.utcnow()}})
+
+
+def test_matches_logical_operators():
+    document = {"sender_id": "u1", "recipient_id": None, "updated_at": 2}
+    assert _matches(document, {"$or": [{"recipient_id": "u2"}, {"sender_id": "u1"}]})
+    assert not _matches(document, {"$or": [{"recipient_id": "u2"}, {"sender_id": "u2"}]})
+    assert _matches(document, {"$and": [{"recipient_id": None}, {"$or": [{"updated_at": {"$gt": 1}}]}]})
+    assert not _matches(document, {"$and": [{"recipient_id": None}, {"updated_at": {"$gt": 2}}]})
+
+
+def test_matches_plain_dict_value_is_equality():
+    document = {"location": {"lat": 51.2}}
+    assert _matches(document, {"location": {"lat": 51.2}})
+    assert not _matches(document, {"location": {"lat": 52.0}})
+
+
+# _project
+def test_project_inclusion_keeps_id_unless_excluded():
+    document = {"_id": 1, "id": "a", "title": "t", "content": "c"}
+    assert _project(document, {"id": 1, "title": 1}) == {"_id": 1, "id": "a", "title": "t"}
+    assert _project(document, {"_id": 0, "id": 1}) == {"id": "a"}
+
+
+def test_project_exclusion_and_copy():
+    document = {"_id": 1, "id": "a", "hashed_password": "x"}
+    assert _project(document, {"_id": 0, "hashed_password": 0}) == {"id": "a"}
+    projected = _project(document, None)
+    projected["id"] = "b"
+    assert document["id"] == "a"
+
+
+# _apply_update
+def test_apply_update_operators():
+    earlier = datetime(2024, 1, 1)
+    document = {"count": 1, "last_activity": earlier, "tags": ["a"], "old": True}
+    _apply_update(document, {
+        "$set": {"status": "Pause"},
+        "$inc": {"count": 2},
+        "$max": {"last_activity": earlier + timedelta(minutes=1)},
+        "$push": {"tags": "b"},
+        "$unset": {"old": ""}
+    })
+    assert document == {
+        "count": 3, "last_activity": earlier + timedelta(minutes=1), "tags": ["a", "b"], "status": "Pause"
+    }
+
+
+def test_apply_update_max_keeps_newer_and_set_on_insert_only_inserting():
+    newer = datetime(2024, 6, 1)
+    document = {"last_activity": newer}
+    _apply_update(document, {"$max": {"last_activity": datetime(2024, 1, 1)}, "$setOnInsert": {"created_at": newer}})
+    assert document == {"last_activity": newer}
+    _apply_update(document, {"$setOnInsert": {"created_at": newer}}, inserting=True)
+    assert document["created_at"] == newer
+
+
+# FakeCollection / FakeCursor
+def test_upsert_copies_equality_fields_of_the_query():
+    database = FakeDatabase()
+    result = run(database.counters.update_one(
+        {"user_id": "u1", "count": {"$gte": 0}}, {"$inc": {"count": 1}, "$setOnInsert": {"peer_id": "u2"}}, upsert=True
+    ))
+    assert result.upserted_id is not None
+    assert run(database.counters.find_one({"user_id": "u1"}, {"_id": 0})) == {"user_id": "u1", "count": 1, "peer_id": "u2"}
+
+
+def test_cursor_sort_puts_missing_values_first_ascending():
+    database = FakeDatabase({"reports": [{"id": "b", "n": 2}, {"id": "none"}, {"id": "a", "n": 1}]})
+    ascending = run(database.reports.find({}, {"_id": 0}).sort("n", 1).to_list(None))
+    descending = run(database.reports.find({}, {"_id": 0}).sort([("n", -1)]).limit(2).to_list(None))
+    assert [d["id"] for d in ascending] == ["none", "a", "b"]
+    assert [d["id"] for d in descending] == ["b", "a"]
+
+
+def test_bulk_write_supported_operations():
+    pymongo = pytest.importorskip("pymongo")
+    database = FakeDatabase({"incidents": [{"id": "a", "status": "open"}, {"id": "b", "status": "open"}]})
+    result = run(database.incidents.bulk_write([
+        pymongo.UpdateOne({"id": "a"}, {"$set": {"status": "closed"}}),
+        pymongo.UpdateOne({"id": "c"}, {"$set": {"status": "new"}}, upsert=True),
+        pymongo.InsertOne({"id": "d", "status": "open"}),
+        pymongo.ReplaceOne({"id": "b"}, {"id": "b", "status": "archived"}),
+    ]))
+    assert (result.matched_count, result.inserted_count, result.upserted_count) == (2, 1, 1)
+    assert list(result.upserted_ids) == [1]
+    statuses = {d["id"]: d["status"] for d in run(database.incidents.find({}, {"_id": 0}).to_list(None))}
+    assert statuses == {"a": "closed", "b": "archived", "c": "new", "d": "open"}
+
+
+# Repository behaviour on top of the fake
+def test_repository_insert_copies_and_fires_hooks():
+    repositories = Repositories(FakeDatabase())
+    observed, written = [], []
+    repositories.hooks.observers.append(lambda collection, operation, seconds: observed.append((collection, operation)))
+    repositories.hooks.write_hooks.append(lambda collection, operation: written.append((collection, operation)))
+
+    document = {"id": "i1", "title": "Einsatz", "created_at": datetime.utcnow()}
+    run(repositories.incidents.insert(document))
+    assert "_id" not in document
+    assert run(repositories.incidents.get_by_id("i1")) == document
+    assert run(repositories.incidents.update_fields("missing", {"status": "closed"})) is False
+    assert written == [("incidents", "insert_one"), ("incidents", "update_one")]
+    assert ("incidents", "find_one") in observed
+
+
+def test_find_by_identifier_falls_back_to_user_id():
+    user = {"id": "0b7e9a62-2f0e-4d1c-9d1c-4c2c8c3f0a11", "email": "beamter@stadtwache.de"}
+    repositories = Repositories(FakeDatabase({"users": [user]}))
+    assert run(repositories.users.find_by_identifier(user["email"]))["id"] == user["id"]
+    assert run(repositories.users.find_by_identifier(user["id"]))["email"] == user["email"]
+    assert run(repositories.users.find_by_identifier("unknown@stadtwache.de", user["id"]))["id"] == user["id"]
@@ -0,0 +1,22 @@
+"""
+Import smoke test - the backend module must load with the pinned requirements
+(catches import errors such as names moved between starlette modules)
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend")))
+
+
+def test_server_imports():
+    pytest.importorskip("fastapi")
+    pytest.importorskip("motor")
+    import server
+
+    paths = {route.path for route in server.app.routes}
+    assert "/api/app/config" in paths
+    assert "/api/sync" in paths
+    assert server.socket_app is not None